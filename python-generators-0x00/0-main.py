@@ -1,5 +1,5 @@
 import io
-import uuid
+import sys
 import requests
 import csv
 import seed
@@ -18,20 +18,62 @@ def fetch_csv_from_url(url):
     except requests.exceptions.RequestException as e:
         print(f"Error fetching CSV file: {e}")
         return None
-    
-def csv_row_generator(csv_buffer):
+
+
+def stream_csv_from_url(url, chunk_size=64 * 1024):
+    """
+    Open a streaming download of a CSV file.
+
+    The body is read and decoded chunk by chunk, so memory use stays flat
+    whatever the file size. The returned lines can be passed straight to
+    csv_row_generator. Lines are split only at CR/LF line breaks and keep
+    their endings, so csv can rebuild quoted fields that span lines and
+    Unicode line separators inside a name stay part of the row.
+
+    Args:
+        url: Link to the CSV file
+        chunk_size: Bytes read from the socket at a time
+
+    Returns:
+        An iterator over the decoded lines that closes the download once
+        it is exhausted or closed, or None if the request failed
+    """
+    try:
+        response = requests.get(url, stream=True, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching CSV file: {e}")
+        return None
+
+    # S3 sends text/csv without a charset, which requests treats as Latin-1
+    encoding = response.encoding
+    if "charset" not in response.headers.get("content-type", "").lower():
+        encoding = "utf-8-sig"
+    # let urllib3 undo any gzip/deflate transfer encoding
+    response.raw.decode_content = True
+    # io wrappers fail once urllib3 closes the body at EOF; `with response` closes it
+    response.raw.auto_close = False
+    print("CSV file streaming from url.")
+
+    def lines():
+        with response:
+            body = io.BufferedReader(response.raw, buffer_size=chunk_size)
+            yield from io.TextIOWrapper(body, encoding=encoding, newline="")
+
+    return lines()
+
+
+def csv_row_generator(csv_buffer, schema_version=1):
     """
-    Generator that yields one row at a time from CSV buffer.
-    Each yield returns a tuple: (uuid, name, email, age)
+    Generator that yields one row at a time from CSV buffer
+    (or any iterable of CSV lines).
+    Each yield returns a tuple: (uuid, name, email, age), with the
+    uuid and age in the format of the given schema version
+    (see seed.table_schema_version)
     """
     reader = csv.DictReader(csv_buffer)
     for row in reader:
-        yield (
-            str(uuid.uuid4()),
-            row['name'],
-            row['email'],
-            row['age']
-        )
+        yield seed.new_user_row(row['name'], row['email'], row['age'], schema_version)
 
 if __name__ == "__main__":
     # Step 1: Connect to MySQL server and create database
@@ -46,11 +88,20 @@ if __name__ == "__main__":
         if connection:
             seed.create_table(connection)
 
-            # Step 3: Fetch CSV directly from the S3 link and insert into DB
-            csv_buffer = fetch_csv_from_url(S3_CSV_URL)
+            # Optional: bulk load a local CSV passed on the command line
+            if len(sys.argv) > 1:
+                connection.close()
+                connection = seed.connect_to_prodev(allow_local_infile=True)
+                print(f"📦 Bulk loading {sys.argv[1]} into DB...")
+                seed.insert_data(connection, sys.argv[1], engine="bulk")
+                connection.close()
+                sys.exit(0)
+
+            # Step 3: Stream CSV directly from the S3 link and insert into DB
+            csv_buffer = stream_csv_from_url(S3_CSV_URL)
             if csv_buffer:
                 # Create generator for efficient streaming
-                row_gen = csv_row_generator(csv_buffer)
+                row_gen = csv_row_generator(csv_buffer, seed.table_schema_version(connection))
                 
                 # Convert to list to count rows (or keep as generator for true streaming)
                 # rows = list(row_gen)
@@ -58,15 +109,18 @@ if __name__ == "__main__":
 
                 print(f"📦 Inserting records into DB (streaming)...")
                 
-                seed.insert_data(connection, row_gen, from_file=False)
+                seed.insert_data(connection, row_gen, from_file=False, batch_size=1000)
+                # closes the download even if the insert stopped early
+                csv_buffer.close()
                 print("✅ Data insertion completed")
 
                 # Verification: Check if DB and table are populated
                 cursor = connection.cursor()
-                cursor.execute("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = 'ALX_prodev';")
-                result = cursor.fetchone()
-                if result:
-                    print("✅ Database ALX_prodev is present")
+                if seed.backend().name == "mysql":
+                    cursor.execute("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = 'ALX_prodev';")
+                    result = cursor.fetchone()
+                    if result:
+                        print("✅ Database ALX_prodev is present")
 
                 cursor.execute("SELECT * FROM user_data LIMIT 5;")
                 rows = cursor.fetchall()
@@ -1,43 +1,183 @@
+import queue
+import threading
+
 import seed
-from mysql.connector import Error
+from seed import Error
+from rows import RowShaper
 
-def stream_users():
+def stream_users(row_factory="dict"):
     """
-    Generator function that connects to the ALX_prodev MySQL database
-    and streams user records one by one from the user_data table.
+    Generator function that borrows a connection to the ALX_prodev
+    database from the shared pool and streams user records one by one
+    from the user_data table.
+
+    Args:
+        row_factory: "dict" (default), "tuple" (values in seed.USER_COLUMNS
+            order) or "record" (namedtuple) rows; see RowShaper
     """
 
     connection = None
     db_cursor = None
+    exhausted = False
 
     try:
-        connection = seed.connect_to_prodev()
-        if connection.is_connected():
-            db_cursor = connection.cursor(dictionary=True, buffered=False)
+        connection = seed.acquire_connection()
+        if connection is not None:
+            db_cursor = connection.cursor(dictionary=row_factory == "dict", buffered=False)
 
             db_cursor.execute("SELECT * FROM user_data")
+            shape = RowShaper(db_cursor, row_factory)
 
-            # yield each row as a dictionary
-            for row in db_cursor:
-                yield row
+            # yield each row, pulling rows in backend-sized
+            # chunks to keep per-row driver overhead low
+            fetch_size = seed.backend().fetch_size
+            while True:
+                rows = db_cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from shape(rows)
+            exhausted = True
     except Error as e:
         print(f"Database error: {e}")
     finally:
-        # if db_cursor is not None:
-        #     db_cursor.close()
-         # Close cursor first if it exists
-        if db_cursor is not None:
-            try:
-                db_cursor.close()
-            except Error:
-                # Ignore errors from unread results during cursor close
-                pass
-        
-        # Close connection without checking is_connected()
-        if connection is not None:
-            try:
-                connection.close()
-            except Error:
-                # Ignore any errors during connection close
-                pass
-    
\ No newline at end of file
+        # Cancels the query instead of draining it if we stopped early
+        seed.finish_stream(connection, db_cursor, exhausted)
+
+
+_DONE = object()
+
+
+def _offer(out, item, stop):
+    """Put item on out unless the consumer has stopped listening."""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _scan_range(connection, low, high, ordered, out, stop):
+    """
+    Stream one user_id range over an already checked-out connection into out.
+
+    Rows are passed on in fetchmany-sized lists to keep queue traffic low.
+    The range ends with _DONE, or with the exception that stopped it.
+    """
+    db_cursor = None
+    exhausted = False
+
+    try:
+        try:
+            db_cursor = connection.cursor(dictionary=True, buffered=False)
+
+            clause, params = seed.range_clause(low, high)
+            order = " ORDER BY user_id" if ordered else ""
+            db_cursor.execute("SELECT * FROM user_data" + clause + order, params)
+
+            fetch_size = seed.backend().fetch_size
+            while True:
+                rows = db_cursor.fetchmany(fetch_size)
+                if not rows:
+                    exhausted = True
+                    break
+                if not _offer(out, rows, stop):
+                    break
+        finally:
+            seed.finish_stream(connection, db_cursor, exhausted)
+    except BaseException as e:
+        # any failure, not only database errors, must reach the consumer,
+        # which otherwise waits forever for this range's _DONE
+        _offer(out, e, stop)
+        return
+    _offer(out, _DONE, stop)
+
+
+def stream_users_parallel(n_workers=4, ordered=False):
+    """
+    Generator that scans user_data with several connections at once.
+
+    The user_id key space is split into n_workers ranges of similar size
+    and each range is streamed by its own thread and pooled connection;
+    the drivers wait on the network with the GIL released, so the scans
+    overlap. Results are merged into a single stream of user dictionaries.
+
+    Every range's connection is checked out before any thread starts, so
+    a range never waits on the pool behind the others; n_workers is
+    capped at the pool size.
+
+    Args:
+        n_workers: Number of ranges scanned concurrently (at most the
+            connection pool size)
+        ordered: Yield users in user_id order; otherwise rows are yielded
+            as soon as any range produces them
+
+    Yields:
+        One user dictionary at a time
+
+    Raises:
+        The exception that stopped a range (seed.Error or any other), so
+        a partial scan never looks complete
+    """
+    pool = seed.get_pool()
+    n_workers = max(1, min(n_workers, pool.size))
+
+    connections = []
+    try:
+        connection = seed.acquire_connection()
+        if connection is None:
+            return
+        connections.append(connection)
+        ranges = seed.user_id_ranges(connection, n_workers)
+        while len(connections) < len(ranges):
+            connection = seed.acquire_connection()
+            if connection is None:
+                raise seed.PoolTimeoutError("Could not open a connection for every range")
+            connections.append(connection)
+    except BaseException:
+        for connection in connections:
+            seed.release_connection(connection)
+        raise
+
+    stop = threading.Event()
+    if ordered:
+        # one queue per range, drained in key order
+        outputs = [queue.Queue(maxsize=4) for _ in ranges]
+    else:
+        shared = queue.Queue(maxsize=2 * len(ranges))
+        outputs = [shared] * len(ranges)
+
+    workers = [
+        threading.Thread(
+            target=_scan_range, args=(connection, low, high, ordered, out, stop), daemon=True
+        )
+        for connection, (low, high), out in zip(connections, ranges, outputs)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        if ordered:
+            for out in outputs:
+                while True:
+                    rows = out.get()
+                    if rows is _DONE:
+                        break
+                    if isinstance(rows, BaseException):
+                        raise rows
+                    yield from rows
+        else:
+            remaining = len(workers)
+            while remaining:
+                rows = shared.get()
+                if rows is _DONE:
+                    remaining -= 1
+                    continue
+                if isinstance(rows, BaseException):
+                    raise rows
+                yield from rows
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
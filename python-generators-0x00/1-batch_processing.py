@@ -1,62 +1,166 @@
 
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 import seed 
-from mysql.connector import Error
+from seed import Error
+from adaptive import AdaptiveBatchSize
+from columnar import ColumnBatch
+from predicates import Age, compile_where
+from prefetch import prefetch
+from rows import RowShaper
 
 
-def stream_users_in_batches(batch_size):
+def stream_users_in_batches(batch_size, columnar=False, where=None, row_factory="dict"):
     """
     Generator function that fetches rows in batches from the user_data table.
     
     Args:
-        batch_size: Number of rows to fetch per batch
+        batch_size: Number of rows to fetch per batch, or an
+            AdaptiveBatchSize that picks each fetch size from the measured
+            fetch time and batch size
+        columnar: Yield ColumnBatch objects with one contiguous column per
+            field instead of a list of per-row dictionaries
+        where: Optional predicate (see predicates.py); the parts that can
+            be expressed in SQL are pushed into the query's WHERE clause
+            and only the rest is checked in Python
+        row_factory: "dict", "tuple" or "record" rows (see RowShaper);
+            ignored when columnar is set
         
     Yields:
-        List of user dictionaries for each batch
+        List of user dictionaries (or a ColumnBatch) for each batch
     """
     connection = None
     db_cursor = None
+    exhausted = False
 
     try:
-        connection = seed.connect_to_prodev()
-        if connection.is_connected():
-            db_cursor = connection.cursor(dictionary=True, buffered=False)
-            db_cursor.execute("SELECT * FROM user_data")
-
-            batch = []
-            for row in db_cursor:
-                batch.append(row)
-                if len(batch) == batch_size:
-                    yield batch
-                    batch = []
+        connection = seed.acquire_connection()
+        if connection is not None:
+            if columnar:
+                row_factory = "tuple"
+            db_cursor = connection.cursor(dictionary=row_factory == "dict", buffered=False)
+            clause, params, residual = compile_where(where)
+            db_cursor.execute("SELECT * FROM user_data" + clause, params)
+            names = [column[0] for column in db_cursor.description]
+            shape = RowShaper(db_cursor, row_factory)
 
-            if batch:
-                yield batch
+            sizer = batch_size if isinstance(batch_size, AdaptiveBatchSize) else None
+            while True:
+                started = time.perf_counter()
+                batch = db_cursor.fetchmany(batch_size if sizer is None else sizer.size)
+                if not batch:
+                    break
+                if sizer is not None:
+                    sizer.observe(batch, time.perf_counter() - started)
+                if columnar:
+                    batch = ColumnBatch.from_rows(names, batch)
+                    if residual is not None:
+                        batch = batch.filter(batch.evaluate(residual))
+                else:
+                    batch = shape(batch)
+                    if residual is not None:
+                        batch = [user for user in batch if residual(shape.view(user))]
+                if len(batch):
+                    yield batch
+            exhausted = True
     except Error as e:
         print(f"Database error: {e}")
     finally:
-        if db_cursor is not None:
-            try:
-                db_cursor.close()
-            except Error:
-                pass
-        
-        if connection is not None:
-            try:
-                connection.close()
-            except Error:
-                pass
+        # Cancels the query instead of draining it if we stopped early
+        seed.finish_stream(connection, db_cursor, exhausted)
+
 
 
+def _process_batch(process, batch):
+    """
+    Apply process to every user of a batch (runs in a worker process).
 
-def batch_processing(batch_size):
+    Columnar batches are only expanded into dictionaries here, so they
+    travel to the workers as compact columns.
+    """
+    users = batch.rows() if isinstance(batch, ColumnBatch) else batch
+    if process is None:
+        return list(users) if isinstance(batch, ColumnBatch) else users
+    return [process(user) for user in users]
+
+
+def _fan_out(batches, process, workers, ordered, max_in_flight):
+    """
+    Run _process_batch over batches in a process pool.
+
+    At most max_in_flight batches are submitted and not yet collected, so
+    the reader waits for the workers instead of queueing the whole table.
+    Workers are started by a fork server rather than forked from this
+    process, which may be running the prefetch thread (a child forked
+    from a multi-threaded process can deadlock on a lock held at fork).
+
+    Yields:
+        The processed users of each batch, in read order if ordered
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque() if ordered else set()
+        for batch in batches:
+            if len(pending) >= max_in_flight:
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            future = executor.submit(_process_batch, process, batch)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+        if ordered:
+            while pending:
+                yield pending.popleft().result()
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+def batch_processing(batch_size, columnar=False, where=Age > 25, prefetch_depth=0,
+                     process=None, workers=0, ordered=True, max_in_flight=None):
     """
     Processes each batch to filter users over the age of 25.
     
     Args:
-        batch_size: Number of rows to process per batch
+        batch_size: Number of rows to process per batch, or an
+            AdaptiveBatchSize
+        columnar: Stream columnar batches instead of lists of dictionaries
+        where: Filter to apply; by default users over the age of 25,
+            evaluated by the database
+        prefetch_depth: When > 0, fetch up to this many batches ahead on a
+            background thread while the current batch is processed
+        process: Optional function applied to every matching user; its
+            result is printed instead of the user. Must be a module-level
+            (picklable) function when workers is set
+        workers: When > 0, batches are read on this process's single
+            connection and processed by a pool of this many processes
+        ordered: With workers, print batches in the order they were read;
+            otherwise each batch is printed as soon as it is processed
+        max_in_flight: With workers, the most batches submitted but not
+            yet printed (defaults to twice the number of workers)
     """
-    for batch in stream_users_in_batches(batch_size):
-        # for each batch is a user in a batch is over the age of 25
-        for user in batch:
-            if user['age'] > 25:
-                print(user)
\ No newline at end of file
+    batches = stream_users_in_batches(batch_size, columnar, where)
+    if prefetch_depth > 0:
+        batches = prefetch(batches, prefetch_depth)
+    # every user in a batch already matches the filter
+    if workers > 0:
+        results = _fan_out(batches, process, workers, ordered, max_in_flight or 2 * workers)
+    elif process is None:
+        results = (batch.rows() if columnar else batch for batch in batches)
+    else:
+        results = (_process_batch(process, batch) for batch in batches)
+
+    for users in results:
+        for user in users:
+            print(user)
\ No newline at end of file
@@ -1,24 +1,87 @@
 import seed
+from seed import Error
+from rows import RowShaper
 
-def paginate_users(page_size, offset):
+
+OFFSET_PAGE_QUERY = "SELECT * FROM user_data LIMIT %s OFFSET %s"
+KEYSET_PAGE_QUERY = "SELECT * FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s"
+
+
+def _fetch_page(query, params, cursor=None, row_factory="dict"):
+    """
+    Run a page query and return its rows shaped by row_factory.
+
+    Uses cursor when one is given (it must have been opened with
+    dictionary=True exactly for "dict" rows), otherwise opens a
+    short-lived pooled connection just for this page.
+    """
+    if cursor is not None:
+        cursor.execute(query, params)
+        return RowShaper(cursor, row_factory)(cursor.fetchall())
+
+    with seed.get_pool().connection() as connection:
+        cursor = connection.cursor(dictionary=row_factory == "dict")
+        cursor.execute(query, params)
+        rows = RowShaper(cursor, row_factory)(cursor.fetchall())
+        cursor.close()
+        return rows
+
+
+def paginate_users(page_size, offset, cursor=None, row_factory="dict"):
     """Fetch a single page of users."""
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
-    return rows
+    return _fetch_page(OFFSET_PAGE_QUERY, (page_size, offset), cursor, row_factory)
 
 
-def lazy_pagination(page_size):
+def paginate_users_after(page_size, last_user_id=None, cursor=None, row_factory="dict"):
+    """
+    Fetch the page of users that follows last_user_id in primary key order.
+
+    Unlike OFFSET, the server seeks straight to last_user_id on the
+    primary key index, so the cost of a page does not grow with depth.
+    """
+    # every user_id sorts after the empty string, so '' starts from the top
+    lower_bound = '' if last_user_id is None else last_user_id
+    return _fetch_page(KEYSET_PAGE_QUERY, (lower_bound, page_size), cursor, row_factory)
+
+
+def lazy_pagination(page_size, keyset=False, row_factory="dict"):
     """
     Generator that lazily loads paginated data from the users database.
     Fetches one page at a time, yielding each page only when needed.
+
+    One pooled connection and one prepared statement are kept for the lifetime
+    of the generator and released when it is exhausted, closed, or
+    garbage-collected (e.g. after islice stops early).
+
+    With keyset=True each page resumes after the last user_id seen
+    instead of using LIMIT/OFFSET, so walking the table stays linear.
+
+    row_factory selects "dict", "tuple" or "record" rows (see RowShaper).
     """
-    offset = 0
-    while True:
-        page = paginate_users(page_size, offset)
-        if not page:
-            break  # stop when no more data
-        yield page  # yield the current page of users
-        offset += page_size  # move to the next page
+    connection = None
+    cursor = None
+    try:
+        connection = seed.acquire_connection()
+        cursor = connection.cursor(prepared=True, dictionary=row_factory == "dict")
+
+        offset = 0
+        last_user_id = None
+        while True:
+            if keyset:
+                page = paginate_users_after(page_size, last_user_id, cursor, row_factory)
+            else:
+                page = paginate_users(page_size, offset, cursor, row_factory)
+            if not page:
+                break  # stop when no more data
+            yield page  # yield the current page of users
+            offset += page_size  # move to the next page
+            # user_id is the first column of tuple and record rows
+            last_user_id = page[-1]['user_id'] if row_factory == "dict" else page[-1][0]
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+
+        seed.release_connection(connection)
@@ -1,5 +1,5 @@
 import seed
-from mysql.connector import Error
+from seed import Error
 
 def stream_user_ages(): 
     """
@@ -8,31 +8,27 @@ def stream_user_ages():
     """
     connection = None
     db_cursor = None
+    exhausted = False
     try:
-        connection = seed.connect_to_prodev()
-        cursor = connection.cursor(dictionary=True, buffered=False)
-        cursor.execute("SELECT age FROM user_data")
+        connection = seed.acquire_connection()
+        if connection is not None:
+            db_cursor = connection.cursor(dictionary=True, buffered=False)
+            db_cursor.execute("SELECT age FROM user_data")
 
-        for row in cursor:
-            yield row['age']
+            fetch_size = seed.backend().fetch_size
+            while True:
+                rows = db_cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row['age']
+            exhausted = True
 
     except Error as e:
         print(f"Database error streaming user ages: {e}")
     finally:
-        if db_cursor is not None:
-            try:
-                db_cursor.close()
-            except Error:
-                # Ignore errors from unread results during cursor close
-                pass
-        
-        # Close connection without checking is_connected()
-        if connection is not None:
-            try:
-                connection.close()
-            except Error:
-                # Ignore any errors during connection close
-                pass
+        # Cancels the query instead of draining it if we stopped early
+        seed.finish_stream(connection, db_cursor, exhausted)
 
             
     
@@ -0,0 +1,103 @@
+"""
+adaptive.py
+Self-tuning fetch sizes for the batch generators.
+
+    from adaptive import AdaptiveBatchSize
+    sizer = AdaptiveBatchSize(target_seconds=0.05, on_batch=print)
+    for batch in stream_users_in_batches(sizer):
+        ...
+
+Pass an AdaptiveBatchSize wherever a batch size is expected. After each
+fetch it compares the measured fetch time and the approximate size of
+the batch in memory with the budgets and scales the next fetch towards
+whichever budget is tighter. Each step at most doubles or halves the
+size, so one slow fetch does not swing it, and row width and network
+latency are picked up without hand tuning.
+"""
+
+
+import sys
+
+
+def estimate_row_bytes(row):
+    """Approximate memory held by one fetched row (dict or tuple) and its values."""
+    values = row.values() if isinstance(row, dict) else row
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in values)
+
+
+class AdaptiveBatchSize:
+    """Chooses the size of each fetch from the ones before it."""
+
+    def __init__(self, initial=1000, target_seconds=0.05, target_bytes=None,
+                 min_size=10, max_size=100000, on_batch=None):
+        """
+        Initialize the sizer.
+
+        Args:
+            initial: Size of the first fetch
+            target_seconds: Time budget per fetch, or None
+            target_bytes: Memory budget per batch, or None
+            min_size: Smallest fetch size
+            max_size: Largest fetch size
+            on_batch: Optional callback receiving a dictionary with the
+                batch number, requested size, rows, seconds, bytes and the
+                size chosen for the next fetch
+        """
+        if target_seconds is None and target_bytes is None:
+            raise ValueError("set target_seconds, target_bytes or both")
+        self.size = max(min_size, min(initial, max_size))
+        self.target_seconds = target_seconds
+        self.target_bytes = target_bytes
+        self.min_size = min_size
+        self.max_size = max_size
+        self.on_batch = on_batch
+        self.batches = 0
+        self._seconds_per_row = None
+        self._bytes_per_row = None
+
+    def observe(self, rows, seconds):
+        """
+        Record one fetch and choose the next size.
+
+        Args:
+            rows: The rows the fetch returned
+            seconds: How long the fetch took
+
+        Returns:
+            The size for the next fetch
+        """
+        requested = self.size
+        self.batches += 1
+        batch_bytes = 0
+        if rows:
+            per_row = seconds / len(rows)
+            row_bytes = estimate_row_bytes(rows[0])
+            batch_bytes = len(rows) * row_bytes
+            # average with the previous fetches to damp noisy timings
+            if self._seconds_per_row is None:
+                self._seconds_per_row = per_row
+                self._bytes_per_row = row_bytes
+            else:
+                self._seconds_per_row = (self._seconds_per_row + per_row) / 2
+                self._bytes_per_row = (self._bytes_per_row + row_bytes) / 2
+
+            # a short final fetch says nothing about the right size
+            if len(rows) == requested:
+                ideal = self.max_size
+                if self.target_seconds is not None and self._seconds_per_row > 0:
+                    ideal = min(ideal, self.target_seconds / self._seconds_per_row)
+                if self.target_bytes is not None:
+                    ideal = min(ideal, self.target_bytes / self._bytes_per_row)
+                ideal = max(requested / 2, min(ideal, requested * 2))
+                self.size = int(max(self.min_size, min(ideal, self.max_size)))
+
+        if self.on_batch is not None:
+            self.on_batch({
+                "batch": self.batches,
+                "size": requested,
+                "rows": len(rows),
+                "seconds": seconds,
+                "bytes": batch_bytes,
+                "next_size": self.size,
+            })
+        return self.size
@@ -0,0 +1,238 @@
+"""
+age_stats.py
+Single-pass, constant-memory statistics over stream_user_ages().
+
+StreamingStats keeps count, mean and variance (Welford), min/max, a
+fixed-width histogram and a t-digest for quantiles. Every part can be
+merged, so shards of the table can be summarised in parallel and
+combined afterwards.
+"""
+
+
+import math
+
+
+class TDigest:
+    """
+    Merging t-digest for approximate quantiles in bounded memory.
+
+    Values are buffered and periodically merged into at most about
+    compression centroids, which are kept small near the tails so
+    extreme quantiles such as p99 stay accurate.
+    """
+
+    def __init__(self, compression=100):
+        """
+        Initialize an empty digest.
+
+        Args:
+            compression: Accuracy/size trade-off; higher keeps more centroids
+        """
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids = []  # sorted (mean, weight) pairs
+        self._buffer = []
+
+    def _k(self, q):
+        """Scale function mapping a quantile to centroid index space."""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        """Inverse of the scale function."""
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def add(self, value, weight=1):
+        """Add a value to the digest."""
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _compress(self):
+        """Merge buffered values into the centroid list."""
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+
+        total = self.count
+        merged = []
+        mean, weight = points[0]
+        weight_before = 0
+        q_limit = self._q(self._k(0) + 1)
+        for next_mean, next_weight in points[1:]:
+            if (weight_before + weight + next_weight) / total <= q_limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append((mean, weight))
+                weight_before += weight
+                q_limit = self._q(self._k(weight_before / total) + 1)
+                mean, weight = next_mean, next_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def merge(self, other):
+        """Fold another digest into this one."""
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Estimate the value at quantile q.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            The estimated value, or None if the digest is empty
+        """
+        self._compress()
+        if not self._centroids:
+            return None
+
+        target = q * self.count
+        cumulative = 0
+        previous_center, previous_mean = 0, self.min
+        for mean, weight in self._centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                if span <= 0:
+                    return mean
+                return previous_mean + (target - previous_center) / span * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+
+        span = self.count - previous_center
+        if span <= 0:
+            return self.max
+        return previous_mean + (target - previous_center) / span * (self.max - previous_mean)
+
+
+class StreamingStats:
+    """Mergeable one-pass summary of a numeric stream."""
+
+    def __init__(self, bucket_width=10, compression=100):
+        """
+        Initialize an empty summary.
+
+        Args:
+            bucket_width: Width of each histogram bucket
+            compression: t-digest compression used for quantiles
+        """
+        self.bucket_width = bucket_width
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.histogram = {}
+        self.digest = TDigest(compression)
+
+    def add(self, value):
+        """Add one value to every statistic."""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        bucket = int(value // self.bucket_width) * self.bucket_width
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        self.digest.add(value)
+
+    def update(self, values):
+        """Add every value from an iterable; returns self."""
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """
+        Fold another partial summary into this one.
+
+        Uses Chan et al.'s pairwise update so variance stays exact.
+        """
+        if other.bucket_width != self.bucket_width:
+            raise ValueError("Cannot merge summaries with different bucket widths")
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.count = count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            for bucket, n in other.histogram.items():
+                self.histogram[bucket] = self.histogram.get(bucket, 0) + n
+            self.digest.merge(other.digest)
+        return self
+
+    @property
+    def variance(self):
+        """Population variance of the values seen so far."""
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def stddev(self):
+        """Population standard deviation of the values seen so far."""
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0..1)."""
+        return self.digest.quantile(q)
+
+    def summary(self):
+        """Return every statistic as a plain dictionary."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "stddev": self.stddev,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "histogram": dict(sorted(self.histogram.items())),
+        }
+
+
+def summarize_ages(ages=None, bucket_width=10):
+    """
+    Compute every age statistic in one pass.
+
+    Args:
+        ages: Iterable of ages (defaults to stream_user_ages())
+        bucket_width: Width of each histogram bucket in years
+
+    Returns:
+        The filled StreamingStats
+    """
+    if ages is None:
+        ages = __import__("4-stream_ages").stream_user_ages()
+    return StreamingStats(bucket_width=bucket_width).update(ages)
+
+
+if __name__ == "__main__":
+    stats = summarize_ages().summary()
+    for name, value in stats.items():
+        print(f"{name}: {value}")
@@ -0,0 +1,534 @@
+"""
+backends.py
+Storage backends for the ALX_prodev user_data table.
+
+MySQL is the default. The SQLite backend lets every generator run (and be
+benchmarked) on a machine without a MySQL server. Pick one with the
+PRODEV_BACKEND environment variable ("mysql" or "sqlite") or with
+seed.use_backend().
+"""
+
+
+import csv
+import os
+import sqlite3
+import tempfile
+
+try:
+    import mysql.connector
+except ImportError:  # the SQLite backend works without the MySQL driver
+    mysql = None
+
+
+# Exceptions raised by whichever database driver is in use
+DRIVER_ERRORS = (sqlite3.Error,) + ((mysql.connector.Error,) if mysql else ())
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ALX_prodev.db")
+
+
+def change_triggers(table, log):
+    """
+    Return (name, event, statement) for the triggers that record every
+    user_id written to or removed from table in the log table.
+    """
+    return [
+        (f"{log}_ins", "INSERT", f"INSERT INTO {log} (user_id) VALUES (NEW.user_id)"),
+        (f"{log}_upd", "UPDATE", f"INSERT INTO {log} (user_id) VALUES (OLD.user_id), (NEW.user_id)"),
+        (f"{log}_del", "DELETE", f"INSERT INTO {log} (user_id) VALUES (OLD.user_id)"),
+    ]
+
+
+def dict_factory(cursor, row):
+    """SQLite row factory that builds the same dicts as a MySQL dictionary cursor."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """
+    SQLite cursor that accepts the MySQL "%s" parameter style.
+
+    Lets the queries in this package run unchanged on both backends.
+    """
+
+    def execute(self, sql, parameters=()):
+        return super().execute(sql.replace("%s", "?"), parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return super().executemany(sql.replace("%s", "?"), seq_of_parameters)
+
+
+class SQLiteConnection(sqlite3.Connection):
+    """
+    SQLite connection with the parts of the mysql.connector API the
+    generators rely on.
+    """
+
+    def cursor(self, dictionary=False, buffered=False, prepared=False):
+        """
+        Open a cursor.
+
+        SQLite cursors always step through results lazily and cache
+        compiled statements, so buffered and prepared are accepted for
+        compatibility and ignored.
+        """
+        cursor = super().cursor(SQLiteCursor)
+        if dictionary:
+            cursor.row_factory = dict_factory
+        return cursor
+
+    def is_connected(self):
+        """Return True if the connection can still run a query."""
+        try:
+            self.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+
+class MySQLBackend:
+    """The original MySQL server backend."""
+
+    name = "mysql"
+    # unbuffered cursors already stream; fetchmany only trims Python overhead
+    fetch_size = 1000
+    # appended to an INSERT into user_data to update users keyed on email
+    upsert_clause = "ON DUPLICATE KEY UPDATE name = VALUES(name), age = VALUES(age)"
+    # adds (bucket, users, age_sum) deltas to user_age_stats
+    age_stats_upsert_query = (
+        "INSERT INTO user_age_stats (bucket, users, age_sum) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE users = users + VALUES(users), age_sum = age_sum + VALUES(age_sum)"
+    )
+    # schema version -> statements creating a user table named {table}
+    user_table_ddl = {
+        1: ["""
+        CREATE TABLE IF NOT EXISTS {table} (
+            user_id CHAR(36) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL NOT NULL,
+            INDEX(user_id)
+        );
+        """],
+        # 16-byte time-ordered ids, 1-byte ages and an email index
+        2: ["""
+        CREATE TABLE IF NOT EXISTS {table} (
+            user_id BINARY(16) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age TINYINT UNSIGNED NOT NULL,
+            INDEX idx_user_data_email (email)
+        );
+        """],
+    }
+
+    def __init__(self, host=None, user=None, password=None, database="ALX_prodev"):
+        """
+        Initialize the backend, falling back to PRODEV_MYSQL_* variables.
+
+        Args:
+            host: MySQL host
+            user: MySQL user
+            password: MySQL password
+            database: Name of the database to use
+        """
+        self.host = host or os.environ.get("PRODEV_MYSQL_HOST", "localhost")
+        self.user = user or os.environ.get("PRODEV_MYSQL_USER", "root")
+        self.password = password or os.environ.get("PRODEV_MYSQL_PASSWORD", "ishmael204@sql!")
+        self.database = database
+
+    def connect_server(self, **options):
+        """Connect to the MySQL server without selecting a database."""
+        if mysql is None:
+            raise ImportError("mysql-connector-python is required for the MySQL backend")
+        return mysql.connector.connect(
+            host=self.host, user=self.user, password=self.password, **options
+        )
+
+    def connect(self, **options):
+        """Connect to the ALX_prodev database."""
+        if mysql is None:
+            raise ImportError("mysql-connector-python is required for the MySQL backend")
+        return mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            **options
+        )
+
+    def create_database(self, cursor):
+        """Create the database if it does not already exist."""
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database};")
+
+    def bulk_load(self, cursor, rows, schema_version=1, table="user_data"):
+        """
+        Load rows into table with LOAD DATA LOCAL INFILE.
+
+        The rows are staged in a headerless temporary CSV (version 2 ids
+        as hex for UNHEX()), so they never go through the client protocol
+        one by one. The connection must be opened with
+        allow_local_infile=True and the server must have local_infile
+        enabled.
+
+        Returns:
+            Tuple of (rows staged, rows loaded, up to three warning
+            messages); LOAD DATA LOCAL skips duplicate keys and coerces
+            bad values with only a warning
+        """
+        staged = tempfile.NamedTemporaryFile(
+            mode="w", newline="", encoding="utf-8", suffix=".csv", delete=False
+        )
+        try:
+            with staged:
+                writer = csv.writer(staged, lineterminator="\n")
+                count = 0
+                for row in rows:
+                    if schema_version == 2:
+                        row = (row[0].hex(),) + tuple(row[1:])
+                    writer.writerow(row)
+                    count += 1
+            if schema_version == 2:
+                columns = "(@user_id, name, email, age) SET user_id = UNHEX(@user_id)"
+            else:
+                columns = "(user_id, name, email, age)"
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                "LINES TERMINATED BY '\\n' " + columns,
+                (staged.name,)
+            )
+            loaded = cursor.rowcount
+            warnings = []
+            if cursor.warning_count:
+                cursor.execute("SHOW WARNINGS LIMIT 3")
+                warnings = [message for _, _, message in cursor.fetchall()]
+        finally:
+            os.remove(staged.name)
+        return count, loaded, warnings
+
+    def cancel_query(self, connection):
+        """
+        Abort the statement running on connection.
+
+        Sends KILL QUERY from a short-lived side connection so the server
+        stops producing rows instead of the client draining them.
+
+        Returns:
+            True, as the interrupted connection should not be reused
+        """
+        try:
+            side = self.connect()
+            try:
+                cursor = side.cursor()
+                cursor.execute(f"KILL QUERY {int(connection.connection_id)}")
+                cursor.close()
+            finally:
+                side.close()
+        except DRIVER_ERRORS:
+            pass
+        return True
+
+    def swap_tables(self, cursor, current, replacement, backup):
+        """
+        Atomically rename current to backup and replacement to current.
+
+        Allowed under lock_tables as long as both tables are write locked.
+        """
+        cursor.execute(f"RENAME TABLE {current} TO {backup}, {replacement} TO {current}")
+
+    def capture_changes(self, cursor, table, log):
+        """
+        Start logging the user_id of every row changed in table.
+
+        Creates the log table and insert, update and delete triggers on
+        table if they do not exist yet.
+
+        Returns:
+            True if the log was created by this call, so changes made
+            before now were not captured
+        """
+        created = not self.table_exists(cursor, log)
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {log} ("
+            "change_id BIGINT AUTO_INCREMENT PRIMARY KEY, user_id CHAR(36) NOT NULL)"
+        )
+        for name, event, statement in change_triggers(table, log):
+            cursor.execute(
+                "SELECT 1 FROM information_schema.triggers "
+                "WHERE trigger_schema = DATABASE() AND trigger_name = %s",
+                (name,)
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW {statement}")
+        return created
+
+    def stop_capturing(self, cursor, table, log):
+        """Drop the triggers and log table created by capture_changes."""
+        for name, _, _ in change_triggers(table, log):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {log}")
+
+    def lock_tables(self, cursor, tables):
+        """Block every other session from reading or writing tables."""
+        cursor.execute("LOCK TABLES " + ", ".join(f"{table} WRITE" for table in tables))
+
+    def unlock_tables(self, cursor):
+        """Release the locks taken by lock_tables."""
+        cursor.execute("UNLOCK TABLES")
+
+    def table_exists(self, cursor, table):
+        """Return True if table exists in the current database."""
+        cursor.execute(
+            "SELECT 1 FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            (table,)
+        )
+        return cursor.fetchone() is not None
+
+    def schema_version(self, cursor, table="user_data"):
+        """
+        Return the schema version of table from the type of its user_id
+        column (BINARY(16) in version 2), or None if it does not exist.
+        """
+        cursor.execute(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'user_id'",
+            (table,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return 2 if row[0].lower() == "binary" else 1
+
+    def create_unique_email_index(self, cursor, table="user_data"):
+        """
+        Add a unique index on email, which upserts are keyed on.
+
+        A plain email index (schema version 2) is dropped in the same
+        ALTER TABLE instead of being kept next to the unique one.
+        """
+        cursor.execute(
+            "SELECT index_name, MIN(non_unique) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s "
+            "GROUP BY index_name HAVING COUNT(*) = 1 AND MAX(column_name) = 'email'",
+            (table,)
+        )
+        indexes = cursor.fetchall()
+        if any(not non_unique for _, non_unique in indexes):
+            return
+        changes = [f"ADD UNIQUE INDEX uq_{table}_email (email)"]
+        changes += [f"DROP INDEX {name}" for name, _ in indexes]
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(changes))
+
+
+class SQLiteBackend:
+    """A single-file SQLite backend for running without a MySQL server."""
+
+    name = "sqlite"
+    # rows come straight from the page cache, so larger steps are cheap
+    fetch_size = 5000
+    upsert_clause = "ON CONFLICT(email) DO UPDATE SET name = excluded.name, age = excluded.age"
+    age_stats_upsert_query = (
+        "INSERT INTO user_age_stats (bucket, users, age_sum) VALUES (%s, %s, %s) "
+        "ON CONFLICT(bucket) DO UPDATE SET "
+        "users = users + excluded.users, age_sum = age_sum + excluded.age_sum"
+    )
+    user_table_ddl = {
+        1: ["""
+        CREATE TABLE IF NOT EXISTS {table} (
+            user_id CHAR(36) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL NOT NULL
+        );
+        """],
+        2: [
+            """
+        CREATE TABLE IF NOT EXISTS {table} (
+            user_id BLOB PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age INTEGER NOT NULL
+        );
+        """,
+            "CREATE INDEX IF NOT EXISTS idx_user_data_email ON {table} (email);",
+        ],
+    }
+
+    def __init__(self, path=None):
+        """
+        Initialize the backend.
+
+        Args:
+            path: Database file (defaults to PRODEV_SQLITE_PATH or
+                ALX_prodev.db next to this module)
+        """
+        self.path = path or os.environ.get("PRODEV_SQLITE_PATH", DEFAULT_SQLITE_PATH)
+
+    def connect_server(self, **options):
+        """SQLite has no server; this opens the database file."""
+        return self.connect(**options)
+
+    def connect(self, **options):
+        """
+        Open the database file.
+
+        Connections may be handed between threads by the pool, so the
+        same-thread check is disabled; each one is only used by one
+        thread at a time.
+        """
+        options.pop("allow_local_infile", None)
+        options.setdefault("timeout", 30)
+        return sqlite3.connect(
+            self.path, factory=SQLiteConnection, check_same_thread=False, **options
+        )
+
+    def create_database(self, cursor):
+        """The database file is created on connect; nothing to do."""
+
+    def bulk_load(self, cursor, rows, schema_version=1, table="user_data"):
+        """
+        SQLite has no bulk loader, so rows are inserted with a single
+        executemany inside the caller's transaction, which is its fastest
+        path.
+
+        Returns:
+            Tuple of (rows sent, rows loaded, warning messages), as for
+            MySQL; a failing row raises instead of warning
+        """
+        cursor.executemany(
+            f"INSERT INTO {table} (user_id, name, email, age) VALUES (%s, %s, %s, %s)", rows
+        )
+        return cursor.rowcount, cursor.rowcount, []
+
+    def cancel_query(self, connection):
+        """
+        SQLite steps a statement only when rows are fetched, so an
+        abandoned query costs nothing once its cursor is closed.
+
+        Returns:
+            False, as the connection can be reused
+        """
+        return False
+
+    def swap_tables(self, cursor, current, replacement, backup):
+        """
+        Rename current to backup and replacement to current in one transaction.
+
+        Joins the transaction opened by lock_tables if there is one.
+        """
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")
+        cursor.execute(f"ALTER TABLE {current} RENAME TO {backup}")
+        cursor.execute(f"ALTER TABLE {replacement} RENAME TO {current}")
+
+    def capture_changes(self, cursor, table, log):
+        """
+        Start logging the user_id of every row changed in table.
+
+        Returns:
+            True if the log was created by this call, so changes made
+            before now were not captured
+        """
+        created = not self.table_exists(cursor, log)
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {log} ("
+            "change_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL)"
+        )
+        for name, event, statement in change_triggers(table, log):
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} "
+                f"BEGIN {statement}; END"
+            )
+        return created
+
+    def stop_capturing(self, cursor, table, log):
+        """Drop the triggers and log table created by capture_changes."""
+        for name, _, _ in change_triggers(table, log):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {log}")
+
+    def lock_tables(self, cursor, tables):
+        """
+        Block other writers until the next commit.
+
+        SQLite locks the whole file, so tables is only for compatibility.
+        """
+        if cursor.connection.in_transaction:
+            cursor.connection.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+
+    def unlock_tables(self, cursor):
+        """The write lock ends with the transaction; nothing to do."""
+
+    def table_exists(self, cursor, table):
+        """Return True if table exists in the database file."""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (table,)
+        )
+        return cursor.fetchone() is not None
+
+    def schema_version(self, cursor, table="user_data"):
+        """
+        Return the schema version of table from the type of its user_id
+        column (BLOB in version 2), or None if it does not exist.
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        for _, name, column_type, *_ in cursor.fetchall():
+            if name == "user_id":
+                return 2 if column_type.upper() == "BLOB" else 1
+        return None
+
+    def create_unique_email_index(self, cursor, table="user_data"):
+        """
+        Add a unique index on email, which upserts are keyed on.
+
+        Index names are global in SQLite, and migrate_user_data leaves
+        uq_user_data_email on user_data_v1, so the table's own indexes are
+        checked rather than the name. A plain email index (schema version
+        2) is dropped once the unique one exists.
+        """
+        cursor.execute(f"PRAGMA index_list({table})")
+        indexes = [(name, unique) for _, name, unique, *_ in cursor.fetchall()]
+        plain = []
+        for name, unique in indexes:
+            cursor.execute(f"PRAGMA index_info({name})")
+            if [column for _, _, column in cursor.fetchall()] == ["email"]:
+                if unique:
+                    return
+                plain.append(name)
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        taken = {name for (name,) in cursor.fetchall()}
+        index, n = f"uq_{table}_email", 1
+        while index in taken:
+            n += 1
+            index = f"uq_{table}_email_{n}"
+        cursor.execute(f"CREATE UNIQUE INDEX {index} ON {table} (email)")
+        for name in plain:
+            cursor.execute(f"DROP INDEX {name}")
+
+
+BACKENDS = {
+    MySQLBackend.name: MySQLBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+
+def make_backend(name=None, **options):
+    """
+    Build a backend by name.
+
+    Args:
+        name: "mysql" or "sqlite" (defaults to PRODEV_BACKEND or "mysql")
+        **options: Arguments for the backend constructor
+
+    Returns:
+        A backend instance
+    """
+    name = name or os.environ.get("PRODEV_BACKEND", MySQLBackend.name)
+    try:
+        return BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown backend: {name!r}") from None
@@ -0,0 +1,181 @@
+"""
+benchmark.py
+Throughput and memory benchmarks for the streaming generators.
+
+Seeds synthetic user_data tables of each requested size into disposable
+SQLite files, then measures stream_users, batch_processing,
+lazy_pagination and compute_average_age for every batch size. Each
+measurement runs in a fresh process so peak RSS is its own; a second,
+traced run records the tracemalloc peak. Results go to a JSON report
+that can be compared between commits:
+
+    python benchmark.py --sizes 1000 100000 --batch-sizes 100 1000 -o before.json
+"""
+
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import seed
+from synthetic import synthetic_chunks
+
+
+GENERATORS = ("stream_users", "batch_processing", "lazy_pagination", "compute_average_age")
+
+
+def seed_dataset(path, rows, chunk_size=50000):
+    """
+    Create a SQLite user_data table at path holding rows synthetic users.
+
+    Args:
+        path: Database file to create
+        rows: Number of users
+        chunk_size: Rows per executemany call
+    """
+    seed.use_backend("sqlite", path=path)
+    connection = seed.connect_to_prodev()
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed.create_table(connection)
+    cursor = connection.cursor()
+    for chunk in synthetic_chunks(rows, chunk_size, random_seed=rows):
+        cursor.executemany(seed.INSERT_USER_QUERY, chunk)
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def _workload(generator, batch_size):
+    """Return a zero-argument callable that runs one generator end to end."""
+    if generator == "stream_users":
+        stream_users = __import__('0-stream_users').stream_users
+        return lambda: sum(1 for _ in stream_users())
+    if generator == "batch_processing":
+        batch_processing = __import__('1-batch_processing').batch_processing
+        return lambda: batch_processing(batch_size)
+    if generator == "lazy_pagination":
+        lazy_pagination = __import__('2-lazy_paginate').lazy_pagination
+        return lambda: sum(len(page) for page in lazy_pagination(batch_size))
+    if generator == "compute_average_age":
+        return __import__('4-main').compute_average_age
+    raise ValueError(f"Unknown generator: {generator!r}")
+
+
+def measure(path, rows, generator, batch_size):
+    """
+    Run one generator against one dataset and collect its metrics.
+
+    Meant to run in its own process (see run_isolated).
+
+    Returns:
+        Dictionary with timing and memory figures
+    """
+    seed.use_backend("sqlite", path=path)
+    run = _workload(generator, batch_size)
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        tracemalloc.start()
+        run()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "generator": generator,
+        "rows": rows,
+        "batch_size": batch_size,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_kb": peak_rss_kb,
+        "tracemalloc_peak_bytes": traced_peak,
+    }
+
+
+def run_isolated(*args):
+    """
+    Run measure() in a fresh worker process and return its result.
+
+    The worker is spawned rather than forked: a forked child would start
+    with the pages of this process, which has just seeded the dataset,
+    and report them in its peak RSS.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure, *args).result()
+
+
+def run_benchmarks(sizes, batch_sizes, generators=GENERATORS, workdir=None):
+    """
+    Run every generator for every dataset size and batch size.
+
+    stream_users and compute_average_age do not take a batch size and
+    are measured once per dataset.
+
+    Returns:
+        The report as a dictionary
+    """
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"users_{rows}.db")
+            started = time.perf_counter()
+            seed_dataset(path, rows)
+            print(f"Seeded {rows} rows in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+            for generator in generators:
+                batched = generator in ("batch_processing", "lazy_pagination")
+                for batch_size in (batch_sizes if batched else [None]):
+                    result = run_isolated(path, rows, generator, batch_size)
+                    results.append(result)
+                    print(
+                        f"  {generator:<20} batch={str(batch_size):>6} "
+                        f"{result['rows_per_second']:>12.0f} rows/s "
+                        f"rss={result['peak_rss_kb']} KB "
+                        f"traced={result['tracemalloc_peak_bytes']} B",
+                        file=sys.stderr
+                    )
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "sqlite",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="dataset sizes in rows (up to 10000000)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="batch/page sizes for batch_processing and lazy_pagination")
+    parser.add_argument("--generators", nargs="+", choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument("--workdir", help="directory for the temporary databases")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON report path")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.batch_sizes, args.generators, args.workdir)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+columnar.py
+Column-oriented batches for stream_users_in_batches.
+
+A ColumnBatch stores each column contiguously instead of building a dict
+per row: numeric columns live in an array (a NumPy array when NumPy is
+installed, otherwise array.array) and string columns in plain lists.
+Filters are evaluated over a whole column at once, including the
+comparisons inside predicates from predicates.py (see evaluate).
+"""
+
+
+import operator
+from array import array
+from itertools import compress
+
+try:
+    import numpy
+except ImportError:  # fall back to array.array and list-based masks
+    numpy = None
+
+from predicates import And, Comparison, Not, Or
+
+
+NUMERIC_COLUMNS = frozenset({"age"})
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _mask_and(left, right):
+    if numpy is not None:
+        return numpy.logical_and(left, right)
+    return [a and b for a, b in zip(left, right)]
+
+
+def _mask_or(left, right):
+    if numpy is not None:
+        return numpy.logical_or(left, right)
+    return [a or b for a, b in zip(left, right)]
+
+
+def _mask_not(mask):
+    if numpy is not None:
+        return numpy.logical_not(mask)
+    return [not a for a in mask]
+
+
+def _numeric_column(values):
+    """Pack numeric values (ints or Decimals) into a contiguous array."""
+    if numpy is not None:
+        return numpy.fromiter((int(v) for v in values), dtype=numpy.int64, count=len(values))
+    return array("q", (int(v) for v in values))
+
+
+class ColumnBatch:
+    """A batch of user rows stored column by column."""
+
+    def __init__(self, columns):
+        """
+        Initialize the batch.
+
+        Args:
+            columns: Mapping of column name to an equal-length sequence
+        """
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, names, rows, numeric=NUMERIC_COLUMNS):
+        """
+        Build a batch from tuple rows.
+
+        Args:
+            names: Column names in row order
+            rows: List of row tuples
+            numeric: Names of columns to pack into arrays
+
+        Returns:
+            A ColumnBatch
+        """
+        columns = {}
+        for name, values in zip(names, zip(*rows)):
+            columns[name] = _numeric_column(values) if name in numeric else list(values)
+        if not columns:
+            columns = {name: [] for name in names}
+        return cls(columns)
+
+    def __len__(self):
+        for values in self.columns.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def mask(self, column, op, value):
+        """
+        Compare a whole column against a value.
+
+        Args:
+            column: Column name
+            op: One of <, <=, >, >=, ==, !=
+            value: Value to compare against
+
+        Returns:
+            A boolean NumPy array, or a list of bools without NumPy
+        """
+        compare = OPERATORS[op]
+        values = self.columns[column]
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            return compare(values, value)
+        return [compare(v, value) for v in values]
+
+    def evaluate(self, predicate):
+        """
+        Evaluate a predicate over the whole batch.
+
+        Comparisons run column-wise through mask() and are combined
+        element-wise for &, | and ~; only Where callables (and
+        comparisons on columns not in the batch) are checked row by row.
+
+        Returns:
+            A mask suitable for filter()
+        """
+        if isinstance(predicate, Comparison) and predicate.column in self.columns:
+            return self.mask(predicate.column, predicate.op, predicate.value)
+        if isinstance(predicate, And):
+            return _mask_and(self.evaluate(predicate.left), self.evaluate(predicate.right))
+        if isinstance(predicate, Or):
+            return _mask_or(self.evaluate(predicate.left), self.evaluate(predicate.right))
+        if isinstance(predicate, Not):
+            return _mask_not(self.evaluate(predicate.inner))
+        return [bool(predicate(row)) for row in self.rows()]
+
+    def filter(self, mask):
+        """Return a new batch with only the rows where mask is true."""
+        columns = {}
+        for name, values in self.columns.items():
+            if numpy is not None and isinstance(values, numpy.ndarray):
+                columns[name] = values[numpy.asarray(mask, dtype=bool)]
+            elif isinstance(values, array):
+                columns[name] = array(values.typecode, compress(values, mask))
+            else:
+                columns[name] = list(compress(values, mask))
+        return ColumnBatch(columns)
+
+    def rows(self):
+        """Yield the batch back as one dictionary per row."""
+        names = list(self.columns)
+        columns = [
+            values.tolist() if numpy is not None and isinstance(values, numpy.ndarray) else values
+            for values in self.columns.values()
+        ]
+        for values in zip(*columns):
+            yield dict(zip(names, values))
@@ -0,0 +1,143 @@
+"""
+dedupe.py
+Skip users whose email is already in user_data before inserting them.
+
+The emails already in the table are loaded once into an exact set or,
+for very large tables, a Bloom filter. Rows whose email is known never
+reach the database, so re-running an import only pays for the new rows.
+A Bloom filter can report false positives, so its hits are confirmed
+with one IN query per chunk before a row is dropped.
+"""
+
+
+import hashlib
+import math
+from itertools import islice
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        Initialize the filter.
+
+        Args:
+            capacity: Number of keys the filter is sized for
+            error_rate: False positive rate at that capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        """Bit positions for key, by double hashing one blake2b digest."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Add key to the filter."""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class KnownEmails:
+    """Emails already in user_data, used to drop rows before insertion."""
+
+    def __init__(self, emails):
+        """
+        Initialize the filter.
+
+        Args:
+            emails: A set or BloomFilter of known emails
+        """
+        self.emails = emails
+        self.exact = not isinstance(emails, BloomFilter)
+        self.skipped = 0
+
+    @classmethod
+    def load(cls, connection, kind="set", fetch_size=5000, error_rate=0.001):
+        """
+        Read every email in user_data.
+
+        Args:
+            connection: Open connection to ALX_prodev
+            kind: "set" for an exact set or "bloom" for a Bloom filter
+                sized for twice the current row count
+            fetch_size: Rows per fetchmany call
+            error_rate: False positive rate of the Bloom filter
+
+        Returns:
+            A KnownEmails instance
+        """
+        if kind not in ("set", "bloom"):
+            raise ValueError(f"Unknown email filter: {kind!r}")
+        cursor = connection.cursor()
+        try:
+            if kind == "bloom":
+                cursor.execute("SELECT COUNT(*) FROM user_data")
+                count = cursor.fetchone()[0]
+                emails = BloomFilter(max(2 * count, 100000), error_rate)
+            else:
+                emails = set()
+            cursor.execute("SELECT email FROM user_data")
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                for (email,) in rows:
+                    emails.add(email)
+        finally:
+            cursor.close()
+        return cls(emails)
+
+    def _confirmed(self, connection, candidates):
+        """Return the candidate emails that really are in user_data."""
+        placeholders = ", ".join(["%s"] * len(candidates))
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT email FROM user_data WHERE email IN ({placeholders})",
+                list(candidates)
+            )
+            return {email for (email,) in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def new_rows(self, connection, rows, chunk_size=1000):
+        """
+        Drop rows whose email is known, and remember the ones passed on.
+
+        Repeats of an email within rows are dropped as well (with a Bloom
+        filter, only once the first copy is committed; the upsert in
+        seed.insert_data absorbs the rest).
+
+        Args:
+            connection: Open connection, used to confirm Bloom filter hits
+            rows: Iterable of (user_id, name, email, age) tuples
+            chunk_size: Rows checked per confirmation query
+
+        Yields:
+            The rows with unseen emails
+        """
+        iterator = iter(rows)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                print(f"   Skipped {self.skipped} rows with known emails")
+                return
+            present = self.emails
+            if not self.exact:
+                candidates = {row[2] for row in chunk if row[2] in self.emails}
+                present = self._confirmed(connection, candidates) if candidates else set()
+            for row in chunk:
+                if row[2] in present:
+                    self.skipped += 1
+                    continue
+                self.emails.add(row[2])
+                yield row
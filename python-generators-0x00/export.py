@@ -0,0 +1,279 @@
+"""
+export.py
+Dump user_data to CSV or JSON Lines files, optionally compressed.
+
+    python export.py users.csv.gz
+    python export.py users.jsonl.xz --columns name email --shards 8
+
+Rows are read in large fetchmany chunks and each chunk is written with a
+single writerows (CSV) or write call, so memory stays constant and the
+per-row Python work is one tuple or dict. Format and compression follow
+the file name (.csv or .jsonl, then .gz, .bz2 or .xz) unless given.
+
+With shards > 1 the user_id key space is split with seed.user_id_ranges
+and every range is exported by its own process and connection to its
+own file (users.part000.csv.gz, users.part001.csv.gz, ...), so
+compression runs on several cores.
+"""
+
+
+import argparse
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import seed
+from seed import Error
+
+
+FORMATS = ("csv", "jsonl")
+
+# compression -> (open function, extra arguments)
+COMPRESSIONS = {
+    "none": (open, {}),
+    # level 6 compresses nearly as well as the default 9 at a fraction of the CPU
+    "gzip": (gzip.open, {"compresslevel": 6}),
+    "bz2": (bz2.open, {}),
+    "lzma": (lzma.open, {}),
+}
+
+SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma", ".lzma": "lzma"}
+
+EXPORT_FETCH_SIZE = 10000
+
+
+def infer_options(path, format=None, compression=None):
+    """
+    Work out the format and compression of an export file from its name.
+
+    Returns:
+        Tuple of (format, compression)
+    """
+    name = path
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix in SUFFIXES:
+        compression = compression or SUFFIXES[suffix]
+        name = name[:-len(suffix)]
+    compression = compression or "none"
+    if format is None:
+        format = "jsonl" if name.lower().endswith((".jsonl", ".json")) else "csv"
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format!r}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression!r}")
+    return format, compression
+
+
+def shard_path(path, index):
+    """Return the file name for one shard: users.csv.gz -> users.part003.csv.gz."""
+    directory, name = os.path.split(path)
+    stem, dot, suffixes = name.partition(".")
+    return os.path.join(directory, f"{stem}.part{index:03d}{dot}{suffixes}")
+
+
+def _select_columns(columns):
+    """Validate a column projection, returning the column tuple."""
+    columns = tuple(columns or seed.USER_COLUMNS)
+    unknown = [column for column in columns if column not in seed.USER_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown user_data columns: {', '.join(unknown)}")
+    return columns
+
+
+def _plain_values(columns, rows):
+    """
+    Make a chunk of rows writable as text.
+
+    Converts 16-byte user_ids (schema version 2) to uuid strings; DECIMAL
+    ages already print as whole numbers.
+    """
+    if "user_id" not in columns:
+        return rows
+    i = columns.index("user_id")
+    if not isinstance(rows[0][i], (bytes, bytearray)):
+        return rows
+    return [row[:i] + (str(uuid.UUID(bytes=bytes(row[i]))),) + row[i + 1:] for row in rows]
+
+
+def _json_value(value):
+    """json.dumps fallback for DECIMAL ages."""
+    return int(value) if value == int(value) else float(value)
+
+
+def _write_rows(connection, path, columns, format, compression, low=None, high=None,
+                fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Export the rows of one user_id range (the whole table by default).
+
+    Returns:
+        Number of rows written
+    """
+    open_file, options = COMPRESSIONS[compression]
+    clause, params = seed.range_clause(low, high)
+    cursor = connection.cursor()
+    count = 0
+    try:
+        cursor.execute(f"SELECT {', '.join(columns)} FROM user_data{clause}", params)
+        with open_file(path, "wt", encoding="utf-8", newline="", **options) as f:
+            if format == "csv":
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(columns)
+            else:
+                encode = json.JSONEncoder(default=_json_value).encode
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                rows = _plain_values(columns, rows)
+                if format == "csv":
+                    writer.writerows(rows)
+                else:
+                    f.write("".join(encode(dict(zip(columns, row))) + "\n" for row in rows))
+                count += len(rows)
+    finally:
+        cursor.close()
+    return count
+
+
+def export_users(path, columns=None, format=None, compression=None, fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Export user_data to a single file.
+
+    Args:
+        path: Output file; format and compression are inferred from it
+        columns: Columns to export (defaults to every column)
+        format: "csv" or "jsonl", overriding the file name
+        compression: "none", "gzip", "bz2" or "lzma", overriding the file name
+        fetch_size: Rows per fetchmany chunk
+
+    Returns:
+        Number of rows exported, or None on error
+    """
+    format, compression = infer_options(path, format, compression)
+    columns = _select_columns(columns)
+
+    connection = None
+    completed = False
+    started = time.perf_counter()
+    try:
+        connection = seed.acquire_connection()
+        count = _write_rows(connection, path, columns, format, compression, fetch_size=fetch_size)
+        completed = True
+    except Error as e:
+        print(f"Error exporting user_data: {e}")
+        return None
+    finally:
+        if connection is not None:
+            # a connection whose read failed part way is not reused
+            seed.release_connection(connection, discard=not completed)
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Exported {count} rows to {path} in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    return count
+
+
+def export_range(path, low, high, columns, format, compression, fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Export one user_id range over its own connection.
+
+    Runs inside a worker process of export_users_parallel.
+
+    Returns:
+        Tuple of (rows exported, error message or None)
+    """
+    connection = seed.connect_to_prodev()
+    if connection is None:
+        return 0, "could not connect to ALX_prodev"
+    try:
+        return _write_rows(connection, path, columns, format, compression, low, high, fetch_size), None
+    except Error as e:
+        return 0, str(e)
+    finally:
+        connection.close()
+
+
+def export_users_parallel(path, shards=None, columns=None, format=None, compression=None,
+                          fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Export user_data to one file per user_id range, in parallel.
+
+    Args:
+        path: Output file name; shard files are named with shard_path
+        shards: Number of ranges and worker processes (defaults to the
+            CPU count)
+        columns: Columns to export (defaults to every column)
+        format: "csv" or "jsonl", overriding the file name
+        compression: "none", "gzip", "bz2" or "lzma", overriding the file name
+        fetch_size: Rows per fetchmany chunk in each worker
+
+    Returns:
+        List of (shard path, rows exported) for the shards that succeeded,
+        or None if the ranges could not be read
+    """
+    format, compression = infer_options(path, format, compression)
+    columns = _select_columns(columns)
+    shards = shards or os.cpu_count() or 1
+
+    try:
+        with seed.get_pool().connection() as connection:
+            ranges = seed.user_id_ranges(connection, shards)
+    except Error as e:
+        print(f"Error exporting user_data: {e}")
+        return None
+
+    started = time.perf_counter()
+    written = []
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            (shard_path(path, i), executor.submit(
+                export_range, shard_path(path, i), low, high, columns, format, compression, fetch_size
+            ))
+            for i, (low, high) in enumerate(ranges)
+        ]
+        for shard, future in futures:
+            count, error = future.result()
+            if error is not None:
+                print(f"   Shard {shard} failed: {error}")
+            else:
+                written.append((shard, count))
+
+    total = sum(count for _, count in written)
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Exported {total} rows to {len(written)} of {len(ranges)} shard files "
+        f"in {elapsed:.2f}s ({rate:.0f} rows/s)"
+    )
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export user_data to CSV or JSON Lines.")
+    parser.add_argument("path", help="output file, e.g. users.csv.gz or users.jsonl.xz")
+    parser.add_argument("--columns", nargs="+", choices=seed.USER_COLUMNS)
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--compression", choices=tuple(COMPRESSIONS))
+    parser.add_argument("--shards", type=int, default=1,
+                        help="export this many user_id ranges in parallel, one file each")
+    parser.add_argument("--fetch-size", type=int, default=EXPORT_FETCH_SIZE)
+    args = parser.parse_args(argv)
+
+    options = dict(
+        columns=args.columns, format=args.format,
+        compression=args.compression, fetch_size=args.fetch_size
+    )
+    if args.shards > 1:
+        export_users_parallel(args.path, args.shards, **options)
+    else:
+        export_users(args.path, **options)
+
+
+if __name__ == "__main__":
+    main()
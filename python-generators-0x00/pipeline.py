@@ -0,0 +1,324 @@
+"""
+pipeline.py
+Compose the streaming generators into ETL pipelines.
+
+    from pipeline import from_stream_users, AggregateSink
+    stats = (
+        from_stream_users()
+        .filter(lambda user: user['age'] > 25)
+        .map(enrich, workers=4)
+        .run(AggregateSink(key=lambda user: user['age']))
+    )
+
+A pipeline is a chain of generators, so items flow through one at a time
+and nothing is materialised. A stage given workers=N runs its function in
+a thread (or process) pool with at most queue_size items in flight, and
+buffer() moves everything upstream onto a background thread behind a
+bounded queue; in both cases a slow consumer holds producers back.
+Every stage counts items in and out and its throughput (see stats()).
+"""
+
+
+import csv
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+
+import seed
+from age_stats import StreamingStats
+from prefetch import prefetch
+
+
+class StageStats:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.started = None
+        self.finished = None
+
+    def as_dict(self):
+        """Return the counters and throughput as a dictionary."""
+        elapsed = 0.0
+        if self.started is not None:
+            elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "seconds": elapsed,
+            "items_per_second": self.items_out / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def _counted(items, stats, count_in=False):
+    """Pass items through while updating a stage's counters."""
+    stats.started = time.perf_counter()
+    try:
+        for item in items:
+            if count_in:
+                stats.items_in += 1
+            stats.items_out += 1
+            yield item
+    finally:
+        stats.finished = time.perf_counter()
+
+
+def _apply(kind, func, item):
+    """Run one map/filter/flat_map step; returns a list of output items."""
+    if kind == "map":
+        return [func(item)]
+    if kind == "filter":
+        return [item] if func(item) else []
+    return list(func(item))
+
+
+def _run_parallel(items, kind, func, workers, executor, queue_size):
+    """
+    Apply func over items in a pool, keeping at most queue_size in flight.
+
+    Output keeps input order; submitting stops while the oldest result is
+    outstanding and the window is full, which is the stage's backpressure.
+    """
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(_apply, kind, func, item))
+            if len(pending) >= queue_size:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class Pipeline:
+    """A source followed by a chain of stages."""
+
+    def __init__(self, source, name="source", queue_size=64):
+        """
+        Initialize the pipeline.
+
+        Args:
+            source: Any iterable of items
+            name: Name reported for the source in stats()
+            queue_size: Default bound for buffers and in-flight work
+        """
+        self.queue_size = queue_size
+        self._stats = [StageStats(name)]
+        self._items = _counted(source, self._stats[0], count_in=True)
+
+    def _stage(self, name, build):
+        """Append a stage built from the current item stream."""
+        stats = StageStats(name)
+        self._stats.append(stats)
+        upstream = self._items
+
+        def counted_input():
+            for item in upstream:
+                stats.items_in += 1
+                yield item
+
+        self._items = _counted(build(counted_input()), stats)
+        return self
+
+    def _function_stage(self, kind, func, workers, executor, name):
+        def build(items):
+            if workers:
+                return _run_parallel(items, kind, func, workers, executor, self.queue_size)
+            if kind == "map":
+                return map(func, items)
+            if kind == "filter":
+                return filter(func, items)
+            return chain.from_iterable(map(func, items))
+
+        return self._stage(name or kind, build)
+
+    def map(self, func, workers=0, executor="thread", name=None):
+        """
+        Replace each item with func(item).
+
+        Args:
+            func: Function to apply (must be picklable for processes)
+            workers: Pool size; 0 runs func inline
+            executor: "thread" or "process"
+            name: Name reported in stats()
+        """
+        return self._function_stage("map", func, workers, executor, name)
+
+    def filter(self, func, workers=0, executor="thread", name=None):
+        """Keep the items for which func(item) is true."""
+        return self._function_stage("filter", func, workers, executor, name)
+
+    def flat_map(self, func, workers=0, executor="thread", name=None):
+        """Replace each item with every item of the iterable func(item)."""
+        return self._function_stage("flat_map", func, workers, executor, name)
+
+    def batch(self, size, name=None):
+        """Group items into lists of up to size items."""
+        return self._stage(name or "batch", lambda items: seed.chunked(items, size))
+
+    def window(self, size, step=1, name=None):
+        """
+        Emit sliding windows (tuples) of size items, advancing by step.
+
+        The first window is emitted as soon as it fills and the next ones
+        start every step items after it, so windows begin at items 0,
+        step, 2 * step, ...
+        """
+        def build(items):
+            recent = deque(maxlen=size)
+            for i, item in enumerate(items):
+                recent.append(item)
+                # item i closes the window that started at i - size + 1
+                if i >= size - 1 and (i - size + 1) % step == 0:
+                    yield tuple(recent)
+
+        return self._stage(name or "window", build)
+
+    def buffer(self, size=None, name=None):
+        """
+        Run everything upstream on a background thread behind a bounded queue.
+
+        Lets the source and early stages work ahead of a slow consumer by
+        at most size items.
+        """
+        depth = size or self.queue_size
+        return self._stage(name or "buffer", lambda items: prefetch(items, depth))
+
+    def __iter__(self):
+        return self._items
+
+    def run(self, sink):
+        """
+        Drain the pipeline into a sink.
+
+        Args:
+            sink: Object with a consume(items) method
+
+        Returns:
+            Whatever the sink returns
+        """
+        return sink.consume(self._items)
+
+    def stats(self):
+        """Return per-stage counters and throughput, in pipeline order."""
+        return [(stage.name, stage.as_dict()) for stage in self._stats]
+
+
+def from_stream_users(queue_size=64):
+    """Pipeline over every user, one dictionary at a time."""
+    stream_users = __import__('0-stream_users').stream_users
+    return Pipeline(stream_users(), "stream_users", queue_size)
+
+
+def from_lazy_pagination(page_size=1000, keyset=True, queue_size=64):
+    """Pipeline over every user, read page by page."""
+    lazy_pagination = __import__('2-lazy_paginate').lazy_pagination
+    users = chain.from_iterable(lazy_pagination(page_size, keyset=keyset))
+    return Pipeline(users, "lazy_pagination", queue_size)
+
+
+def from_csv(path, queue_size=64):
+    """Pipeline over the rows of a CSV file, as dictionaries."""
+    def rows():
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+    return Pipeline(rows(), "csv", queue_size)
+
+
+class DatabaseSink:
+    """Insert users into user_data in committed batches."""
+
+    def __init__(self, batch_size=1000, checkpoint=None, schema_version=None):
+        """
+        Initialize the sink.
+
+        Args:
+            batch_size: Rows per executemany chunk
+            checkpoint: Optional checkpoint name (see seed.insert_batches)
+            schema_version: Schema of user_data, used for generated ids
+                (read from the table by default)
+        """
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.schema_version = schema_version
+
+    def _as_row(self, item, schema_version):
+        """Accept row tuples or user dictionaries (with or without user_id)."""
+        if not isinstance(item, dict):
+            return tuple(item)
+        if item.get('user_id'):
+            return (item['user_id'], item['name'], item['email'], item['age'])
+        return seed.new_user_row(item['name'], item['email'], item['age'], schema_version)
+
+    def consume(self, items):
+        """Insert every item; returns the number of rows inserted."""
+        with seed.get_pool().connection() as connection:
+            schema_version = self.schema_version or seed.table_schema_version(connection)
+            rows = (self._as_row(item, schema_version) for item in items)
+            return seed.insert_batches(connection, rows, self.batch_size, self.checkpoint)
+
+
+class FileSink:
+    """Write items to a JSON Lines or CSV file."""
+
+    def __init__(self, path, format="jsonl"):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Output file path
+            format: "jsonl" (one JSON object per line) or "csv" (items
+                must be dictionaries with the same keys)
+        """
+        if format not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown file format: {format!r}")
+        self.path = path
+        self.format = format
+
+    def consume(self, items):
+        """Write every item; returns the number written."""
+        count = 0
+        with open(self.path, "w", newline='', encoding='utf-8') as f:
+            if self.format == "jsonl":
+                for item in items:
+                    f.write(json.dumps(item, default=str))
+                    f.write("\n")
+                    count += 1
+                return count
+
+            items = iter(items)
+            first = list(islice(items, 1))
+            if not first:
+                return 0
+            writer = csv.DictWriter(f, fieldnames=list(first[0]))
+            writer.writeheader()
+            for item in chain(first, items):
+                writer.writerow(item)
+                count += 1
+        return count
+
+
+class AggregateSink:
+    """Summarise a numeric value of each item with StreamingStats."""
+
+    def __init__(self, key=None, bucket_width=10):
+        """
+        Initialize the sink.
+
+        Args:
+            key: Function extracting the value from an item (defaults to
+                the item itself)
+            bucket_width: Histogram bucket width
+        """
+        self.key = key
+        self.bucket_width = bucket_width
+
+    def consume(self, items):
+        """Aggregate every item; returns the filled StreamingStats."""
+        values = items if self.key is None else map(self.key, items)
+        return StreamingStats(bucket_width=self.bucket_width).update(values)
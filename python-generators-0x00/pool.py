@@ -0,0 +1,220 @@
+"""
+pool.py
+A thread-safe pool of database connections.
+
+seed.get_pool() returns the pool shared by the streaming generators;
+configure_pool() replaces it with one of a different size. Streams hand
+their connection back with finish_stream, which cancels an abandoned
+query rather than draining it.
+"""
+
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from backends import DRIVER_ERRORS
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of connections to the ALX_prodev database.
+
+    At most size connections exist at once; callers beyond that wait in
+    line for a connection to be released. Idle connections are health
+    checked on checkout and replaced once they are older than
+    max_lifetime seconds.
+    """
+
+    def __init__(self, size=8, max_lifetime=3600, timeout=30, factory=None, cancel_query=None):
+        """
+        Initialize the pool.
+
+        Args:
+            size: Maximum number of open connections
+            max_lifetime: Seconds after which a connection is recycled
+            timeout: Default seconds to wait for a free connection
+            factory: Callable that opens a new connection, or returns None
+                if it cannot (seed's shared pool passes connect_to_prodev)
+            cancel_query: Optional callable that aborts the statement
+                running on a connection and returns True if the connection
+                must not be reused (see finish_stream)
+        """
+        if factory is None:
+            raise ValueError("ConnectionPool needs a connection factory")
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.factory = factory
+        self.cancel_query = cancel_query
+        self.closed = False
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._created_at = {}
+        self._lock = threading.Lock()
+        self.metrics = {
+            "checkouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "waiting": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+        }
+
+    def _is_usable(self, connection):
+        """Check a connection's age and liveness before handing it out."""
+        age = time.monotonic() - self._created_at.get(id(connection), 0)
+        if age > self.max_lifetime:
+            return False
+        try:
+            return connection.is_connected()
+        except DRIVER_ERRORS:
+            return False
+
+    def _close(self, connection):
+        """Close a connection and forget it."""
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except DRIVER_ERRORS:
+            pass
+
+    def acquire(self, timeout=None):
+        """
+        Check out a connection, waiting for a free slot if necessary.
+
+        Args:
+            timeout: Seconds to wait (defaults to the pool timeout)
+
+        Returns:
+            An open connection, or None if a new one could not be opened
+
+        Raises:
+            PoolTimeoutError: If no slot was freed in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self.metrics["waiting"] += 1
+
+        started = time.perf_counter()
+        acquired = self._slots.acquire(timeout=timeout)
+        waited = time.perf_counter() - started
+
+        with self._lock:
+            self.metrics["waiting"] -= 1
+            self.metrics["wait_seconds"] += waited
+            self.metrics["max_wait_seconds"] = max(self.metrics["max_wait_seconds"], waited)
+            if waited > 0.001:
+                self.metrics["waits"] += 1
+            if not acquired:
+                self.metrics["timeouts"] += 1
+        if not acquired:
+            raise PoolTimeoutError(f"No pooled connection free after {timeout}s")
+
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_usable(connection):
+                with self._lock:
+                    self.metrics["checkouts"] += 1
+                return connection
+            self._close(connection)
+            with self._lock:
+                self.metrics["recycled"] += 1
+
+        try:
+            connection = self.factory()
+        except BaseException:
+            self._slots.release()
+            raise
+        if connection is None:
+            self._slots.release()
+            return None
+        self._created_at[id(connection)] = time.monotonic()
+        with self._lock:
+            self.metrics["created"] += 1
+            self.metrics["checkouts"] += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        """
+        Return a connection to the pool.
+
+        Args:
+            connection: Connection obtained from acquire (None is ignored)
+            discard: Close the connection instead of keeping it idle
+        """
+        if connection is None:
+            return
+        if self.closed or getattr(connection, "unread_result", False):
+            discard = True
+        if not discard:
+            try:
+                connection.rollback()
+            except DRIVER_ERRORS:
+                discard = True
+
+        if discard:
+            self._close(connection)
+        else:
+            self._idle.put(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that acquires a connection and releases it on exit."""
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def finish_stream(self, connection, cursor, exhausted):
+        """
+        Close a streaming cursor and hand its connection back to the pool.
+
+        If the consumer stopped before the result set was exhausted, the
+        query is cancelled on the server and the connection is recycled
+        instead of reading and discarding every remaining row.
+
+        Args:
+            connection: Pooled connection the stream used (may be None)
+            cursor: The stream's cursor (may be None)
+            exhausted: Whether every row of the result set was read
+        """
+        if connection is None:
+            return
+        if (not exhausted and cursor is not None and self.cancel_query is not None
+                and self.cancel_query(connection)):
+            self.release(connection, discard=True)
+            return
+
+        if cursor is not None:
+            try:
+                cursor.close()
+            except DRIVER_ERRORS:
+                # Ignore errors from unread results during cursor close
+                pass
+        self.release(connection)
+
+    def close_all(self):
+        """
+        Close every idle connection and retire the pool.
+
+        Connections still checked out are closed when they are released.
+        """
+        self.closed = True
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
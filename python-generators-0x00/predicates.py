@@ -0,0 +1,217 @@
+"""
+predicates.py
+A tiny predicate API for filtering user_data rows.
+
+Predicates are built from columns with ordinary comparison operators and
+combined with & (and), | (or) and ~ (not):
+
+    from predicates import Age, Email, Where
+    where = (Age > 25) & Where(lambda user: user['name'].startswith('A'))
+
+Everything that can be expressed in SQL is compiled to a parameterised
+WHERE clause and run by the database; the rest (Where callables and
+anything that depends on them) is evaluated in Python on each row.
+"""
+
+
+import operator
+import re
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_COMPARISONS = {
+    "<": (operator.lt, "<"),
+    "<=": (operator.le, "<="),
+    ">": (operator.gt, ">"),
+    ">=": (operator.ge, ">="),
+    "==": (operator.eq, "="),
+    "!=": (operator.ne, "<>"),
+}
+
+
+def _field(row, name):
+    """Read a field from a dictionary row or an attribute-style record."""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+class Predicate:
+    """Base class for row predicates."""
+
+    pushable = True
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def to_sql(self):
+        """
+        Compile the predicate to SQL.
+
+        Returns:
+            Tuple of (clause with %s placeholders, list of parameters)
+        """
+        raise NotImplementedError
+
+    def __call__(self, row):
+        """Evaluate the predicate against one row in Python."""
+        raise NotImplementedError
+
+    def split(self):
+        """
+        Separate the parts the database can run from the rest.
+
+        Returns:
+            Tuple of (pushable predicate or None, residual predicate or None)
+        """
+        return (self, None) if self.pushable else (None, self)
+
+
+class Comparison(Predicate):
+    """column <op> value"""
+
+    def __init__(self, column, op, value):
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def to_sql(self):
+        return f"{self.column} {_COMPARISONS[self.op][1]} %s", [self.value]
+
+    def __call__(self, row):
+        return _COMPARISONS[self.op][0](_field(row, self.column), self.value)
+
+    def __repr__(self):
+        return f"Comparison({self.column!r}, {self.op!r}, {self.value!r})"
+
+
+class And(Predicate):
+    """Both predicates hold."""
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.pushable = left.pushable and right.pushable
+
+    def to_sql(self):
+        left_sql, left_params = self.left.to_sql()
+        right_sql, right_params = self.right.to_sql()
+        return f"({left_sql} AND {right_sql})", left_params + right_params
+
+    def __call__(self, row):
+        return self.left(row) and self.right(row)
+
+    def split(self):
+        # each side of an AND can be pushed down on its own
+        pushed = None
+        residual = None
+        for part in (self.left, self.right):
+            part_pushed, part_residual = part.split()
+            if part_pushed is not None:
+                pushed = part_pushed if pushed is None else And(pushed, part_pushed)
+            if part_residual is not None:
+                residual = part_residual if residual is None else And(residual, part_residual)
+        return pushed, residual
+
+
+class Or(Predicate):
+    """Either predicate holds."""
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.pushable = left.pushable and right.pushable
+
+    def to_sql(self):
+        left_sql, left_params = self.left.to_sql()
+        right_sql, right_params = self.right.to_sql()
+        return f"({left_sql} OR {right_sql})", left_params + right_params
+
+    def __call__(self, row):
+        return self.left(row) or self.right(row)
+
+
+class Not(Predicate):
+    """The predicate does not hold."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.pushable = inner.pushable
+
+    def to_sql(self):
+        sql, params = self.inner.to_sql()
+        return f"(NOT {sql})", params
+
+    def __call__(self, row):
+        return not self.inner(row)
+
+
+class Where(Predicate):
+    """An arbitrary Python test that is always evaluated client-side."""
+
+    pushable = False
+
+    def __init__(self, test):
+        self.test = test
+
+    def __call__(self, row):
+        return bool(self.test(row))
+
+
+class Column:
+    """A user_data column that builds Comparison predicates."""
+
+    def __init__(self, name):
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid column name: {name!r}")
+        self.name = name
+
+    def __lt__(self, value):
+        return Comparison(self.name, "<", value)
+
+    def __le__(self, value):
+        return Comparison(self.name, "<=", value)
+
+    def __gt__(self, value):
+        return Comparison(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Comparison(self.name, ">=", value)
+
+    def __eq__(self, value):
+        return Comparison(self.name, "==", value)
+
+    def __ne__(self, value):
+        return Comparison(self.name, "!=", value)
+
+    __hash__ = None
+
+
+UserId = Column("user_id")
+Name = Column("name")
+Email = Column("email")
+Age = Column("age")
+
+
+def compile_where(predicate):
+    """
+    Split a predicate into a SQL WHERE clause and a Python residual.
+
+    Args:
+        predicate: A Predicate, or None for no filter
+
+    Returns:
+        Tuple of (" WHERE ..." or "", parameters, residual predicate or None)
+    """
+    if predicate is None:
+        return "", [], None
+    pushed, residual = predicate.split()
+    if pushed is None:
+        return "", [], residual
+    sql, params = pushed.to_sql()
+    return f" WHERE {sql}", params, residual
@@ -0,0 +1,80 @@
+"""
+prefetch.py
+Background read-ahead for the streaming generators.
+
+    from prefetch import prefetch
+    for page in prefetch(lazy_pagination(100), depth=2):
+        ...
+
+A worker thread pulls the next items (batches, pages) from the wrapped
+generator into a bounded queue while the consumer is still working on
+the current one, so database I/O overlaps with processing.
+"""
+
+
+import queue
+import threading
+
+
+_DONE = object()
+
+
+def prefetch(iterable, depth=1):
+    """
+    Iterate over iterable while a background thread reads ahead.
+
+    Stopping early (break, islice, close()) signals the worker, which
+    finishes its current fetch, closes the wrapped generator so its
+    connection is released, and exits before this generator returns.
+
+    Args:
+        iterable: Source of items, typically a batch or page generator
+        depth: Maximum number of items fetched ahead of the consumer
+
+    Yields:
+        The items of iterable, in order
+    """
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def offer(entry):
+        """Put entry on the queue unless the consumer has gone away."""
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        error = None
+        try:
+            for item in iterator:
+                if not offer((item, None)):
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            offer((_DONE, error))
+
+    worker = threading.Thread(target=produce, name="prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        worker.join()
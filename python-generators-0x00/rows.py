@@ -0,0 +1,83 @@
+"""
+rows.py
+Row types returned by the streaming generators.
+
+The generators fetch dicts, tuples or namedtuple records depending on
+their row_factory argument; RowShaper turns each fetched chunk into the
+requested type.
+"""
+
+
+from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
+
+
+ROW_FACTORIES = ("dict", "tuple", "record")
+
+
+@lru_cache(maxsize=None)
+def record_class(columns):
+    """
+    Return the record type for a tuple of column names.
+
+    Records are namedtuples: fields are stored in a slot-less tuple and
+    the name-to-position map is shared by every record of the class.
+    """
+    return namedtuple("UserRecord", columns, rename=True)
+
+
+class RowShaper:
+    """
+    Turns the rows fetched by a cursor into the requested row type.
+
+    Built once per cursor from its description. Besides picking dicts,
+    plain tuples (in column order) or records, it converts DECIMAL ages
+    to int in the same pass, so consumers never see Decimal.
+    """
+
+    def __init__(self, cursor, row_factory="dict"):
+        """
+        Initialize the shaper.
+
+        Args:
+            cursor: Executed cursor; must be a dictionary cursor exactly
+                when row_factory is "dict"
+            row_factory: "dict", "tuple" or "record"
+        """
+        if row_factory not in ROW_FACTORIES:
+            raise ValueError(f"Unknown row factory: {row_factory!r}")
+        self.row_factory = row_factory
+        self.columns = tuple(column[0] for column in cursor.description)
+        self.record = record_class(self.columns)
+        self._age_index = self.columns.index("age") if "age" in self.columns else None
+        self._convert_age = None  # decided from the first row
+
+    def __call__(self, rows):
+        """Shape a list of fetched rows."""
+        if not rows:
+            return rows
+        if self._convert_age is None:
+            first = rows[0]
+            age = None
+            if self._age_index is not None:
+                age = first["age"] if self.row_factory == "dict" else first[self._age_index]
+            self._convert_age = isinstance(age, Decimal)
+
+        if self.row_factory == "dict":
+            if self._convert_age:
+                for row in rows:
+                    row["age"] = int(row["age"])
+            return rows
+
+        if self._convert_age:
+            i = self._age_index
+            rows = [row[:i] + (int(row[i]),) + row[i + 1:] for row in rows]
+        if self.row_factory == "record":
+            make = self.record._make
+            return [make(row) for row in rows]
+        return rows if isinstance(rows[0], tuple) else [tuple(row) for row in rows]
+
+    def view(self, row):
+        """Return a row that supports access by name (for predicates)."""
+        return self.record._make(row) if self.row_factory == "tuple" else row
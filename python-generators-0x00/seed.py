@@ -1,29 +1,80 @@
 """
 seed.py
-Sets up the MySQL database ALX_prodev, creates the user_data table,
+Sets up the database ALX_prodev, creates the user_data table,
 and inserts data from a CSV file using a generator for efficient streaming.
+
+Runs on MySQL by default or on SQLite (see backends.py).
 """
 
 
-import mysql.connector
-from mysql.connector import Error
 import csv
+import os
+import threading
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice, zip_longest
+
+import backends
+import user_age_stats
+from dedupe import KnownEmails
+from pool import ConnectionPool, PoolTimeoutError
+
+
+# user_data columns in table order, as returned by SELECT *
+USER_COLUMNS = ("user_id", "name", "email", "age")
+
+INSERT_USER_QUERY = "INSERT INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
+
+CHECKPOINT_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS seed_checkpoint (
+        source VARCHAR(255) PRIMARY KEY,
+        rows_committed BIGINT NOT NULL
+    );
+    """
+
+
+# Catch-all for database errors on any backend, used as `except Error`
+Error = backends.DRIVER_ERRORS + (PoolTimeoutError,)
+
+_backend = None
+
+
+def backend():
+    """Return the active storage backend, choosing it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = backends.make_backend()
+    return _backend
+
+
+def use_backend(name, **options):
+    """
+    Switch the storage backend and reset the shared connection pool.
+
+    Args:
+        name: "mysql" or "sqlite"
+        **options: Backend options, e.g. path for SQLite
+
+    Returns:
+        The new backend
+    """
+    global _backend, _pool
+    _backend = backends.make_backend(name, **options)
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+    return _backend
 
 
 # function to connect to db
 def connect_db():
-    """Establish a connection to the MySQL database."""
+    """Establish a connection to the database server."""
     try: 
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="ishmael204@sql!",
-        )
-        if connection.is_connected():
-            return connection
+        return backend().connect_server()
     except Error as e:
-        print(f"Error connecting to MySQL: {e}")
+        print(f"Error connecting to {backend().name} server: {e}")
         return None
     
 
@@ -31,100 +82,869 @@ def create_database(connection):
     """Create the ALX_prodev if it does not already exist"""
     try:
         cursor = connection.cursor()
-        cursor.execute("CREATE DATABASE IF NOT EXISTS ALX_prodev;")
+        backend().create_database(cursor)
         print("Database ALX_prodev created successfully")
         cursor.close()
     except Error as e:
         print(f"Error creating database: {e}")
 
 
-def connect_to_prodev():
-    """Connect to the ALX_prodev database."""
+def connect_to_prodev(**options):
+    """
+    Connect to the ALX_prodev database.
+
+    Args:
+        **options: Extra driver connect arguments,
+            e.g. allow_local_infile=True for bulk_load
+    """
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="ishmael204@sql!",
-            database="ALX_prodev"
-        )
-        if connection.is_connected():
-            return connection
+        return backend().connect(**options)
     except Error as e:
         print(f"Error connecting to ALX_prodev database: {e}")
         return None
-    
 
-def create_table(connection):
-    """Create the user_data if it does not exist."""
+
+def create_table(connection, schema_version=1, table="user_data"):
+    """
+    Create the user_data if it does not exist.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        schema_version: 1 for the original layout (CHAR(36) ids, DECIMAL
+            ages); 2 for the compact layout (16-byte time-ordered ids,
+            small integer ages, email index, no redundant id index)
+        table: Table name, used by migrate_user_data for the new copy
+    """
     try:
         cursor = connection.cursor()
-        query = """
-        CREATE TABLE IF NOT EXISTS user_data (
-            user_id CHAR(36) PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            email VARCHAR(255) NOT NULL,
-            age DECIMAL NOT NULL,
-            INDEX(user_id)
-        );
-        """
-        cursor.execute(query)
+        for statement in backend().user_table_ddl[schema_version]:
+            cursor.execute(statement.format(table=table))
         connection.commit()
-        print("Table user_data created successfully")
+        print(f"Table {table} created successfully")
         cursor.close()
     except Error as e:
         print(f"Error creating table: {e}")
 
 
-def row_generator(csv_file):
+def table_schema_version(connection, table="user_data"):
+    """
+    Return the schema version of user_data, read from the table itself.
+
+    Insert paths use it as their default, so ids generated after
+    migrate_user_data match the migrated table.
+
+    Returns:
+        1 or 2 (1 if the table does not exist yet)
+    """
+    cursor = connection.cursor(buffered=True)
+    try:
+        return backend().schema_version(cursor, table) or 1
+    finally:
+        cursor.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# id of each connection lent by acquire_connection -> the pool it came from
+_lenders = {}
+
+
+def configure_pool(size=8, max_lifetime=3600, timeout=30):
+    """
+    Replace the shared connection pool used by the streaming generators.
+
+    Returns:
+        The new ConnectionPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(
+            size=size, max_lifetime=max_lifetime, timeout=timeout,
+            factory=connect_to_prodev, cancel_query=backend().cancel_query
+        )
+        return _pool
+
+
+def get_pool():
+    """Return the shared connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=int(os.environ.get("PRODEV_POOL_SIZE", 8)),
+                factory=connect_to_prodev, cancel_query=backend().cancel_query
+            )
+        return _pool
+
+
+def acquire_connection(timeout=None):
+    """Borrow a connection to ALX_prodev from the shared pool."""
+    pool = get_pool()
+    connection = pool.acquire(timeout)
+    if connection is not None:
+        _lenders[id(connection)] = pool
+    return connection
+
+
+def _lender(connection):
+    """
+    Return the pool that lent connection and forget it.
+
+    The shared pool may have been replaced by configure_pool or
+    use_backend since the connection was borrowed.
+    """
+    return _lenders.pop(id(connection), None) or get_pool()
+
+
+def release_connection(connection, discard=False):
+    """Give a borrowed connection back to the pool that lent it."""
+    if connection is not None:
+        _lender(connection).release(connection, discard)
+
+
+def finish_stream(connection, cursor, exhausted):
+    """Close a stream's cursor and give its connection back to the pool that lent it."""
+    if connection is not None:
+        _lender(connection).finish_stream(connection, cursor, exhausted)
+
+
+def user_id_ranges(connection, parts):
+    """
+    Split the user_id key space into contiguous ranges of similar size.
+
+    Boundaries are read from the primary key index at evenly spaced
+    offsets, so each range holds about the same number of rows
+    whatever the distribution of ids.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        parts: Desired number of ranges
+
+    Returns:
+        List of (low, high) pairs covering every row; low is inclusive,
+        high exclusive and None means unbounded
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM user_data")
+        total = cursor.fetchone()[0]
+        boundaries = []
+        for i in range(1, parts):
+            cursor.execute(
+                "SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+                (total * i // parts,)
+            )
+            row = cursor.fetchone()
+            if row is not None and (not boundaries or row[0] > boundaries[-1]):
+                boundaries.append(row[0])
+    finally:
+        cursor.close()
+    return list(zip([None] + boundaries, boundaries + [None]))
+
+
+def range_clause(low, high):
+    """
+    Build the WHERE clause selecting one range from user_id_ranges.
+
+    Returns:
+        Tuple of (" WHERE ..." or "", parameters)
+    """
+    conditions = []
+    params = []
+    if low is not None:
+        conditions.append("user_id >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append("user_id < %s")
+        params.append(high)
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def uuid7():
+    """
+    Return a new time-ordered UUID (version 7) as 16 bytes.
+
+    The leading 48 bits are the Unix time in milliseconds, so ids
+    generated later sort later and inserts append to the end of the
+    primary key index instead of landing on random pages.
+    """
+    millis = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (millis & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | (rand >> 62 & 0xFFF) << 64
+        | 0b10 << 62
+        | rand & ((1 << 62) - 1)
+    )
+    return value.to_bytes(16, "big")
+
+
+def new_user_id(schema_version=1):
+    """Return a fresh user_id in the format of the given schema version."""
+    if schema_version == 2:
+        return uuid7()
+    return str(uuid.uuid4())
+
+
+def new_user_row(name, email, age, schema_version=1):
+    """
+    Return a (user_id, name, email, age) tuple with a fresh user_id.
+
+    With schema_version=2 the uuid is 16 time-ordered bytes and the age
+    an int.
+    """
+    return new_user_id(schema_version), name, email, age if schema_version == 1 else int(age)
+
+
+def row_generator(csv_file, schema_version=1):
     """
         Generator that yields one row at a time from a CSV file.
         Each yield returns a tuple: (uuid, name, email, age)
+        in the format of the given schema version (see new_user_row).
     """
     with open(csv_file, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            yield (
-                str(uuid.uuid4()),
-                row['name'],
-                row['email'],
-                row['age']
+            yield new_user_row(row['name'], row['email'], row['age'], schema_version)
+
+
+def chunked(rows, size):
+    """
+    Group an iterable of rows into lists of at most size rows.
+
+    Args:
+        rows: Any iterable of row tuples
+        size: Maximum number of rows per chunk
+
+    Yields:
+        Lists of rows, the last one possibly shorter
+    """
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def create_checkpoint_table(connection):
+    """Create the seed_checkpoint table that records resumable progress."""
+    cursor = connection.cursor()
+    cursor.execute(CHECKPOINT_TABLE_DDL)
+    connection.commit()
+    cursor.close()
+
+
+def read_checkpoint(connection, source):
+    """
+    Return how many rows of source have been committed so far.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        source: Name identifying the import, e.g. the CSV path
+
+    Returns:
+        Number of committed rows, or None if source has no checkpoint yet
+    """
+    create_checkpoint_table(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT rows_committed FROM seed_checkpoint WHERE source = %s", (source,))
+    row = cursor.fetchone()
+    cursor.close()
+    return int(row[0]) if row else None
+
+
+def clear_checkpoint(connection, source):
+    """Forget the progress recorded for source so the next import starts over."""
+    create_checkpoint_table(connection)
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM seed_checkpoint WHERE source = %s", (source,))
+    connection.commit()
+    cursor.close()
+
+
+def insert_batches(connection, rows, batch_size, checkpoint=None, upsert=False):
+    """
+    Insert rows in chunks with executemany, committing after each chunk.
+
+    mysql.connector rewrites an executemany INSERT into a single
+    multi-row VALUES statement, so each chunk is one round trip.
+
+    With a checkpoint name, the number of rows committed is stored in
+    seed_checkpoint in the same transaction as each chunk. A later call
+    with the same name skips the rows already committed, so an
+    interrupted import resumes without duplicating rows. The source must
+    yield rows in the same order on every run.
+
+    If the user_age_stats table exists, it is updated in the same
+    transaction as each chunk.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        rows: Iterable of (user_id, name, email, age) tuples
+        batch_size: Number of rows per chunk
+        checkpoint: Optional name identifying this import
+        upsert: Insert with upsert_query() instead of INSERT_USER_QUERY
+
+    Returns:
+        Number of rows inserted by this call
+    """
+    committed = 0
+    if checkpoint is not None:
+        committed = read_checkpoint(connection, checkpoint)
+        if committed:
+            print(f"   Resuming {checkpoint} after {committed} committed rows...")
+            rows = islice(rows, committed, None)
+        elif committed is None:
+            committed = 0
+            cursor = connection.cursor()
+            cursor.execute(
+                "INSERT INTO seed_checkpoint (source, rows_committed) VALUES (%s, 0)",
+                (checkpoint,)
             )
+            connection.commit()
+            cursor.close()
 
+    query = upsert_query() if upsert else INSERT_USER_QUERY
+    ages = user_age_stats.AgeStatsDelta() if user_age_stats.age_stats_enabled(connection) else None
+    cursor = connection.cursor()
+    count = 0
+    started = time.perf_counter()
+    try:
+        for chunk in chunked(rows, batch_size):
+            if ages is not None:
+                ages.count(chunk, cursor, upsert)
+                ages.apply(cursor)
+            cursor.executemany(query, chunk)
+            count += len(chunk)
+            if checkpoint is not None:
+                cursor.execute(
+                    "UPDATE seed_checkpoint SET rows_committed = %s WHERE source = %s",
+                    (committed + count, checkpoint)
+                )
+            connection.commit()
+            print(f"   Inserted {count} rows...")
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Data inserted successfully ({count} rows in {elapsed:.2f}s, {rate:.0f} rows/s)")
+    return count
+
+
+def bulk_load(connection, csv_file, schema_version=None):
+    """
+    Load a local CSV into user_data through the engine's native bulk path.
+
+    Rows are generated with fresh user_ids and handed to the backend's
+    bulk_load: LOAD DATA LOCAL INFILE on MySQL (the connection must be
+    opened with allow_local_infile=True), a single executemany on SQLite.
+    user_age_stats, if it exists, is updated in the same transaction.
+
+    LOAD DATA reports duplicate keys and unconvertible values as warnings
+    rather than errors, so if the server loaded a different number of
+    rows than were staged, or raised any warning, the load is rolled back.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        csv_file: Path to the source CSV
+        schema_version: Schema of the user_data table (read from the
+            table by default)
+
+    Returns:
+        Number of rows loaded (0 if the load was rolled back)
+    """
+    started = time.perf_counter()
+    if schema_version is None:
+        schema_version = table_schema_version(connection)
+    ages = user_age_stats.AgeStatsDelta() if user_age_stats.age_stats_enabled(connection) else None
+    rows = row_generator(csv_file, schema_version)
+    if ages is not None:
+        rows = ages.track(rows)
+    cursor = connection.cursor()
+    try:
+        staged, count, warnings = backend().bulk_load(cursor, rows, schema_version)
+        if count != staged or warnings:
+            connection.rollback()
+            print(
+                f"Bulk load rolled back: {count} of {staged} rows loaded "
+                f"({'; '.join(warnings) or 'no warnings'})"
+            )
+            return 0
+        if ages is not None:
+            ages.apply(cursor)
+        connection.commit()
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Data bulk loaded successfully ({count} rows in {elapsed:.2f}s, {rate:.0f} rows/s)")
+    return count
+
+
+def upsert_query():
+    """Return the INSERT for user_data that updates name and age on a known email."""
+    return f"{INSERT_USER_QUERY} {backend().upsert_clause}"
+
+
+def create_unique_email_index(connection):
+    """
+    Make email unique in user_data so upserts can key on it.
 
-def insert_data(connection, data_source, from_file=True):
-    """Insert data from the CSV into the user_data table."""
+    Returns:
+        True on success, False if the index could not be created (for
+        example because the table already holds duplicate emails)
+    """
+    cursor = connection.cursor()
     try:
+        backend().create_unique_email_index(cursor)
+        connection.commit()
+        return True
+    except Error as e:
+        print(f"Error creating unique email index: {e}")
+        print("Remove duplicate emails from user_data before using upsert")
+        connection.rollback()
+        return False
+    finally:
+        cursor.close()
+
+
+def insert_data(connection, data_source, from_file=True, batch_size=None, engine="insert",
+                checkpoint=None, schema_version=None, upsert=False, email_filter="set"):
+    """
+    Insert data from the CSV into the user_data table.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        data_source: Path to a CSV file, or an iterable of row tuples
+        from_file: Whether data_source is a CSV file path
+        batch_size: When set, rows are sent in chunks of this size and
+            committed per chunk instead of one row at a time
+        engine: "insert" for INSERT statements, or "bulk" to load a local
+            CSV file with bulk_load (requires from_file=True)
+        checkpoint: Name under which progress is recorded after every
+            chunk so a failed import can be resumed (implies batching,
+            1000 rows per chunk unless batch_size is given)
+        schema_version: Schema of the user_data table, which decides the
+            format of the user_ids generated for CSV files (read from the
+            table by default)
+        upsert: Key users on email so re-running an import adds only new
+            users. Rows whose email is already in the table are skipped
+            before they are sent; any that slip through update the
+            existing user's name and age instead of adding a duplicate.
+            Requires a unique index on email, which is created if needed.
+        email_filter: How upsert finds known emails: "set" (exact, in
+            memory), "bloom" (a Bloom filter, for tables too large for a
+            set; hits are confirmed with a query) or None to send every
+            row as an upsert
+
+    Returns:
+        Number of rows inserted (or updated, for upserts); if a
+        checkpointed import fails, the rows it committed before failing
+    """
+    if engine == "bulk":
+        if not from_file:
+            raise ValueError("engine='bulk' requires from_file=True")
+        if upsert:
+            raise ValueError("engine='bulk' does not support upsert; use engine='insert'")
+        if checkpoint is not None:
+            # LOAD DATA commits all rows or none, so there is nothing to resume
+            raise ValueError("engine='bulk' does not support checkpoint; use engine='insert'")
+        try:
+            return bulk_load(connection, data_source, schema_version)
+        except Error as e:
+            print(f"Error bulk loading data: {e}")
+            connection.rollback()
+            return 0
+    if engine != "insert":
+        raise ValueError(f"Unknown insert engine: {engine!r}")
+
+    if from_file:
+        if schema_version is None:
+            schema_version = table_schema_version(connection)
+        rows = row_generator(data_source, schema_version)
+    else:
+        rows = data_source
+
+    if upsert:
+        if checkpoint is not None:
+            # the filtered row stream differs between runs, so row counts
+            # cannot be resumed; re-running an upsert is already cheap
+            raise ValueError("checkpoint cannot be combined with upsert")
+        if not create_unique_email_index(connection):
+            return 0
+        if email_filter is not None:
+            known = KnownEmails.load(connection, email_filter, backend().fetch_size)
+            rows = known.new_rows(connection, rows, batch_size or 1000)
+
+    if checkpoint is not None and not batch_size:
+        batch_size = 1000
+
+    if batch_size:
+        resumed_at = 0
+        try:
+            if checkpoint is not None:
+                resumed_at = read_checkpoint(connection, checkpoint) or 0
+            return insert_batches(connection, rows, batch_size, checkpoint, upsert)
+        except Error as e:
+            print(f"Error inserting data: {e}")
+            connection.rollback()
+            if checkpoint is None:
+                return 0
+            # every chunk before the failing one is committed
+            try:
+                stopped_at = read_checkpoint(connection, checkpoint) or 0
+            except Error:
+                stopped_at = resumed_at
+            print(
+                f"{stopped_at} rows of {checkpoint} committed ({stopped_at - resumed_at} by this "
+                f"run); re-run with checkpoint={checkpoint!r} to resume"
+            )
+            return stopped_at - resumed_at
+
+    try:
+        query = upsert_query() if upsert else INSERT_USER_QUERY
+        ages = user_age_stats.AgeStatsDelta() if user_age_stats.age_stats_enabled(connection) else None
         cursor = connection.cursor()
-        query = "INSERT INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
         count = 0
-        if from_file:
-            import csv
-            with open(data_source, newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                # next(reader)  # Skip header row
-                for row in reader:
-                    data = (
-                        str(uuid.uuid4()),
-                        row['name'],
-                        row['email'],
-                        row['age']
-                    )
-                    cursor.execute(query, data)
-                    count += 1
-        else:
-            # New behaviour: insert from in-memory rows
-            for row in data_source:
-                cursor.execute(query, row)
-                count += 1
-                if count % 1000 == 0:  # Progress update every 1000 rows
-                    print(f"   Inserted {count} rows...")
+        for row in rows:
+            if ages is not None:
+                ages.count([row], cursor, upsert)
+            cursor.execute(query, row)
+            count += 1
+            if count % 1000 == 0:  # Progress update every 1000 rows
+                print(f"   Inserted {count} rows...")
 
+        if ages is not None:
+            ages.apply(cursor)
         connection.commit()
         print(f"Data inserted successfully ({count} rows total)")
         cursor.close()
+        return count
     except Error as e:
         print(f"Error inserting data: {e}")
         connection.rollback()
+        return 0
+
+
+def csv_byte_ranges(csv_file, shards):
+    """
+    Split the body of a CSV file into byte ranges that start on line boundaries.
 
+    Rows are assumed not to contain embedded newlines, which holds for
+    the user_data CSV.
 
-        
\ No newline at end of file
+    Args:
+        csv_file: Path to the CSV file
+        shards: Desired number of ranges
+
+    Returns:
+        Tuple of (fieldnames, [(start, end), ...])
+    """
+    size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        boundaries = [body_start]
+        for i in range(1, shards):
+            f.seek(body_start + (size - body_start) * i // shards)
+            f.readline()  # move to the start of the next full line
+            boundaries.append(min(f.tell(), size))
+        boundaries.append(size)
+
+    fieldnames = next(csv.reader([header.decode("utf-8-sig")]))
+    ranges = [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start
+    ]
+    return fieldnames, ranges
+
+
+def _read_csv_range(f, start, end):
+    """Yield decoded lines from an open binary file between two offsets."""
+    f.seek(start)
+    position = start
+    while position < end:
+        line = f.readline()
+        if not line:
+            break
+        position += len(line)
+        yield line.decode("utf-8")
+
+
+def insert_csv_range(csv_file, start, end, fieldnames, batch_size, schema_version=None):
+    """
+    Insert one byte range of a CSV file over its own connection.
+
+    Runs inside a worker process of insert_data_parallel.
+
+    Returns:
+        Tuple of (rows inserted, error message or None)
+    """
+    connection = connect_to_prodev()
+    if connection is None:
+        return 0, "could not connect to ALX_prodev"
+
+    count = 0
+    cursor = None
+    try:
+        if schema_version is None:
+            schema_version = table_schema_version(connection)
+        ages = user_age_stats.AgeStatsDelta() if user_age_stats.age_stats_enabled(connection) else None
+        cursor = connection.cursor()
+        with open(csv_file, "rb") as f:
+            reader = csv.DictReader(_read_csv_range(f, start, end), fieldnames=fieldnames)
+            rows = (
+                new_user_row(row['name'], row['email'], row['age'], schema_version)
+                for row in reader
+            )
+            for chunk in chunked(rows, batch_size):
+                if ages is not None:
+                    ages.count(chunk)
+                    ages.apply(cursor)
+                cursor.executemany(INSERT_USER_QUERY, chunk)
+                connection.commit()
+                count += len(chunk)
+        return count, None
+    except Exception as e:
+        # bad ages, malformed CSV or undecodable bytes fail only this
+        # range, like database errors, so the parent still sums up
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        return count, f"{type(e).__name__}: {e}"
+    finally:
+        if cursor is not None:
+            cursor.close()
+        connection.close()
+
+
+def insert_data_parallel(csv_file, workers=None, batch_size=1000, schema_version=None):
+    """
+    Insert a CSV file into user_data using a pool of worker processes.
+
+    The file is split on line boundaries into one byte range per worker
+    and each range is parsed and inserted over its own connection.
+
+    Args:
+        csv_file: Path to the source CSV
+        workers: Number of worker processes (defaults to the CPU count)
+        batch_size: Rows per executemany chunk in each worker
+        schema_version: Schema of the user_data table (read from the
+            table by default)
+
+    Returns:
+        Tuple of (rows inserted, number of failed ranges)
+    """
+    workers = workers or os.cpu_count() or 1
+    fieldnames, ranges = csv_byte_ranges(csv_file, workers)
+
+    started = time.perf_counter()
+    inserted = 0
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                insert_csv_range, csv_file, start, end, fieldnames, batch_size, schema_version
+            ): (start, end)
+            for start, end in ranges
+        }
+        for future in as_completed(futures):
+            try:
+                count, error = future.result()
+            except Exception as e:
+                # the worker process itself died
+                count, error = 0, f"{type(e).__name__}: {e}"
+            inserted += count
+            if error is not None:
+                failures += 1
+                start, end = futures[future]
+                print(f"   Range {start}-{end} failed after {count} rows: {error}")
+
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Parallel insert finished: {inserted} rows inserted, {failures} of "
+        f"{len(ranges)} ranges failed ({elapsed:.2f}s, {rate:.0f} rows/s)"
+    )
+    return inserted, failures
+
+
+MIGRATION_CHANGE_LOG = "user_data_changes"
+
+
+def _v2_rows(rows):
+    """Convert version 1 user rows to version 2 (16-byte ids, int ages)."""
+    return [(uuid.UUID(user_id).bytes, name, email, int(age)) for user_id, name, email, age in rows]
+
+
+def _apply_changes(connection, read_cursor, write_cursor, batch_size, commit=True):
+    """
+    Replay logged user_data changes onto user_data_v2.
+
+    Every logged user_id is deleted from user_data_v2 and copied again
+    from user_data if it still exists there, so inserts, updates and
+    deletes all end up in their current state. Only the log entries that
+    were replayed are removed.
+
+    Returns:
+        Number of log entries replayed
+    """
+    replayed = 0
+    while True:
+        read_cursor.execute(
+            f"SELECT change_id, user_id FROM {MIGRATION_CHANGE_LOG} ORDER BY change_id LIMIT %s",
+            (batch_size,)
+        )
+        changes = read_cursor.fetchall()
+        if not changes:
+            return replayed
+
+        user_ids = sorted({user_id for _, user_id in changes})
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        write_cursor.execute(
+            f"DELETE FROM user_data_v2 WHERE user_id IN ({placeholders})",
+            [uuid.UUID(user_id).bytes for user_id in user_ids]
+        )
+        read_cursor.execute(
+            f"SELECT user_id, name, email, age FROM user_data WHERE user_id IN ({placeholders})",
+            user_ids
+        )
+        rows = read_cursor.fetchall()
+        if rows:
+            write_cursor.executemany(
+                "INSERT INTO user_data_v2 (user_id, name, email, age) VALUES (%s, %s, %s, %s)",
+                _v2_rows(rows)
+            )
+        change_ids = [change_id for change_id, _ in changes]
+        write_cursor.execute(
+            f"DELETE FROM {MIGRATION_CHANGE_LOG} "
+            f"WHERE change_id IN ({', '.join(['%s'] * len(change_ids))})",
+            change_ids
+        )
+        if commit:
+            connection.commit()
+        replayed += len(changes)
+
+
+def _user_ids(cursor, table, batch_size):
+    """Yield every user_id of table in key order, one keyset page at a time."""
+    cursor.execute(f"SELECT user_id FROM {table} ORDER BY user_id LIMIT %s", (batch_size,))
+    while True:
+        ids = [user_id for (user_id,) in cursor.fetchall()]
+        if not ids:
+            return
+        yield from ids
+        cursor.execute(
+            f"SELECT user_id FROM {table} WHERE user_id > %s ORDER BY user_id LIMIT %s",
+            (ids[-1], batch_size)
+        )
+
+
+def _same_user_ids(old_cursor, new_cursor, batch_size):
+    """Return True if user_data and user_data_v2 hold exactly the same keys."""
+    # canonical lowercase uuid strings sort in the same order as their bytes
+    old_ids = _user_ids(old_cursor, "user_data", batch_size)
+    new_ids = _user_ids(new_cursor, "user_data_v2", batch_size)
+    for old, new in zip_longest(old_ids, new_ids):
+        if old is None or new is None or uuid.UUID(old).bytes != bytes(new):
+            return False
+    return True
+
+
+def migrate_user_data(connection, batch_size=10000):
+    """
+    Migrate user_data from schema version 1 to the compact version 2, online.
+
+    Triggers on user_data log the user_id of every row inserted, updated
+    or deleted from the start of the migration. The rows are then copied
+    into user_data_v2 in primary key order, one committed chunk at a
+    time, while the live table stays readable and writable, and the
+    logged changes are replayed until few are left. Finally user_data is
+    write locked, the remaining changes are replayed, the key sets of
+    both tables are compared, and the tables are swapped, keeping the old
+    one as user_data_v1. Existing ids are kept (converted to 16 bytes);
+    ages become integers.
+
+    An interrupted migration continues after the last copied id; the
+    change log covers anything written meanwhile, wherever its id sorts.
+
+    Args:
+        connection: Open connection to ALX_prodev
+        batch_size: Rows copied (and changes replayed) per chunk
+
+    Returns:
+        True if the tables were swapped
+    """
+    create_table(connection, schema_version=2, table="user_data_v2")
+    read_cursor = connection.cursor(buffered=True)
+    write_cursor = connection.cursor(buffered=True)
+    locked = False
+    try:
+        if backend().capture_changes(write_cursor, "user_data", MIGRATION_CHANGE_LOG):
+            # rows copied before changes were logged cannot be trusted
+            write_cursor.execute("DELETE FROM user_data_v2")
+        connection.commit()
+
+        read_cursor.execute("SELECT MAX(user_id) FROM user_data_v2")
+        last = read_cursor.fetchone()[0]
+        last_user_id = str(uuid.UUID(bytes=bytes(last))) if last is not None else ''
+
+        copied = 0
+        while True:
+            read_cursor.execute(
+                "SELECT user_id, name, email, age FROM user_data "
+                "WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                (last_user_id, batch_size)
+            )
+            rows = read_cursor.fetchall()
+            if not rows:
+                break
+            write_cursor.executemany(
+                "INSERT INTO user_data_v2 (user_id, name, email, age) VALUES (%s, %s, %s, %s)",
+                _v2_rows(rows)
+            )
+            connection.commit()
+            copied += len(rows)
+            last_user_id = rows[-1][0]
+            print(f"   Copied {copied} rows...")
+
+        # catch up while writers keep running, so the locked pass is short
+        while _apply_changes(connection, read_cursor, write_cursor, batch_size) > batch_size:
+            pass
+
+        backend().lock_tables(write_cursor, ["user_data", "user_data_v2", MIGRATION_CHANGE_LOG])
+        locked = True
+        replayed = _apply_changes(connection, read_cursor, write_cursor, batch_size, commit=False)
+        if not _same_user_ids(read_cursor, write_cursor, batch_size):
+            print("user_data and user_data_v2 hold different user_ids; not swapping")
+            connection.rollback()
+            return False
+
+        backend().swap_tables(write_cursor, "user_data", "user_data_v2", "user_data_v1")
+        connection.commit()
+        backend().unlock_tables(write_cursor)
+        locked = False
+        backend().stop_capturing(write_cursor, "user_data_v1", MIGRATION_CHANGE_LOG)
+        connection.commit()
+        print(
+            f"user_data migrated to schema version 2 ({replayed} changes replayed while "
+            "locked); old table kept as user_data_v1"
+        )
+        return True
+    except Error as e:
+        print(f"Error migrating user_data: {e}")
+        connection.rollback()
+        return False
+    finally:
+        if locked:
+            backend().unlock_tables(write_cursor)
+        read_cursor.close()
+        write_cursor.close()
@@ -0,0 +1,165 @@
+"""
+synthetic.py
+Fast synthetic user_data rows for offline load tests.
+
+Rows are generated a chunk at a time: the random bytes for every id in a
+chunk come from one call, and names and ages are drawn with a single
+random.choices call per column, instead of calling uuid.uuid4() and
+random.randint() for each row. Emails carry a running number so they
+are unique.
+
+    python synthetic.py --rows 5000000 --csv users.csv
+    python synthetic.py --rows 5000000 --insert --batch-size 10000
+"""
+
+
+import argparse
+import csv
+import random
+import time
+
+import seed
+
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Amara", "Ben", "Chidi", "Clara", "Dan", "Efua", "Elena", "Femi",
+    "Grace", "Hana", "Ishmael", "Jamal", "Kofi", "Lena", "Maya", "Nia", "Omar", "Priya",
+    "Quinn", "Rosa", "Sam", "Tariq", "Uma", "Victor", "Wanjiru", "Xavier", "Yaw", "Zara",
+)
+LAST_NAMES = (
+    "Adeyemi", "Altenwerth", "Boateng", "Chen", "Diallo", "Evans", "Fischer", "Garcia",
+    "Hughes", "Ibrahim", "Johnson", "Kamau", "Lopez", "Mensah", "Nguyen", "Okafor",
+    "Patel", "Quaye", "Rossi", "Smith", "Tanaka", "Usman", "Valdez", "Wisozk", "Yeboah",
+)
+DOMAINS = ("gmail.com", "yahoo.com", "hotmail.com", "example.com")
+AGES = tuple(range(18, 121))
+
+# hex digit of the UUID variant nibble -> RFC 4122 variant (10xx)
+_VARIANT = {digit: "89ab"[int(digit, 16) & 3] for digit in "0123456789abcdef"}
+
+
+def _uuid4_strings(raw, count):
+    """Format 16*count random bytes as version 4 UUID strings."""
+    digits = raw.hex()
+    ids = []
+    for start in range(0, 32 * count, 32):
+        h = digits[start:start + 32]
+        ids.append(f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{_VARIANT[h[16]]}{h[17:20]}-{h[20:]}")
+    return ids
+
+
+def _uuid7_bytes(raw, count):
+    """Build count time-ordered (version 7) ids from 10*count random bytes."""
+    prefix = (time.time_ns() // 1_000_000).to_bytes(6, "big")
+    ids = []
+    for start in range(0, 10 * count, 10):
+        r = raw[start:start + 10]
+        ids.append(prefix + bytes((0x70 | r[0] & 0x0F, r[1], 0x80 | r[2] & 0x3F)) + r[3:])
+    return ids
+
+
+def synthetic_chunks(count, chunk_size=10000, random_seed=None, schema_version=1):
+    """
+    Generate synthetic users in chunks.
+
+    Args:
+        count: Total number of users
+        chunk_size: Users per chunk
+        random_seed: Seed for reproducible output (ids included)
+        schema_version: 1 for uuid strings and string ages, 2 for 16-byte
+            time-ordered ids and int ages (see seed.create_table)
+
+    Yields:
+        Lists of (user_id, name, email, age) tuples
+    """
+    rng = random.Random(random_seed)
+    produced = 0
+    while produced < count:
+        n = min(chunk_size, count - produced)
+        if schema_version == 2:
+            ids = _uuid7_bytes(rng.randbytes(10 * n), n)
+            ages = rng.choices(AGES, k=n)
+        else:
+            ids = _uuid4_strings(rng.randbytes(16 * n), n)
+            ages = [str(age) for age in rng.choices(AGES, k=n)]
+        firsts = rng.choices(FIRST_NAMES, k=n)
+        lasts = rng.choices(LAST_NAMES, k=n)
+        domains = rng.choices(DOMAINS, k=n)
+
+        chunk = []
+        for i in range(n):
+            first = firsts[i]
+            last = lasts[i]
+            email = f"{first.lower()}.{last.lower()}{produced + i}@{domains[i]}"
+            chunk.append((ids[i], f"{first} {last}", email, ages[i]))
+        produced += n
+        yield chunk
+
+
+def synthetic_rows(count, chunk_size=10000, random_seed=None, schema_version=1):
+    """Generate synthetic users one (user_id, name, email, age) tuple at a time."""
+    for chunk in synthetic_chunks(count, chunk_size, random_seed, schema_version):
+        yield from chunk
+
+
+def write_csv(path, count, random_seed=None):
+    """
+    Write a CSV in the same name,email,age format as the seed download.
+
+    Returns:
+        Number of rows written
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("name", "email", "age"))
+        for chunk in synthetic_chunks(count, random_seed=random_seed):
+            writer.writerows(row[1:] for row in chunk)
+    return count
+
+
+def insert_synthetic(connection, count, batch_size=10000, random_seed=None, schema_version=None):
+    """
+    Stream synthetic users straight into user_data with seed.insert_data.
+
+    The ids match the schema version of user_data unless one is given.
+
+    Returns:
+        Number of rows inserted
+    """
+    if schema_version is None:
+        schema_version = seed.table_schema_version(connection)
+    rows = synthetic_rows(count, batch_size, random_seed, schema_version)
+    return seed.insert_data(connection, rows, from_file=False, batch_size=batch_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic user_data rows.")
+    parser.add_argument("--rows", type=int, required=True, help="number of users")
+    parser.add_argument("--csv", help="write a name,email,age CSV to this path")
+    parser.add_argument("--insert", action="store_true", help="insert into user_data")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--schema-version", type=int, choices=(1, 2),
+                        help="schema for a new user_data table (an existing one keeps its own)")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible data")
+    args = parser.parse_args(argv)
+
+    if not args.csv and not args.insert:
+        parser.error("choose --csv PATH and/or --insert")
+
+    if args.csv:
+        started = time.perf_counter()
+        write_csv(args.csv, args.rows, args.seed)
+        elapsed = time.perf_counter() - started
+        print(f"Wrote {args.rows} rows to {args.csv} in {elapsed:.2f}s")
+
+    if args.insert:
+        connection = seed.connect_to_prodev()
+        if connection is None:
+            return
+        seed.create_table(connection, args.schema_version or 1)
+        insert_synthetic(connection, args.rows, args.batch_size, args.seed)
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Tests for streaming the seed CSV over HTTP (0-main.py)."""
+import gzip
+import threading
+import unittest
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+main = __import__('0-main')
+
+
+CSV_BODY = (
+    "\ufeffname,email,age\r\n"
+    "Ada Lovelace,ada@example.com,36\r\n"
+    "\"Line\nBreak\",break@example.com,41\r\n"
+    "Nel\u0085son Mandela,nelson@example.com,95\r\n"
+    "Grace\x0bHopper,grace@example.com,85\r\n"
+).encode("utf-8")
+
+
+class CSVHandler(BaseHTTPRequestHandler):
+    """Serves CSV_BODY the way S3 does: text/csv without a charset."""
+
+    def do_GET(self):
+        body = CSV_BODY
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        if self.path == "/users.csv.gz":
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep the test output quiet."""
+
+
+class TestStreamCsvFromUrl(unittest.TestCase):
+    """Test stream_csv_from_url against a local http.server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the server on a free port."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CSVHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_rows_and_lines(self):
+        """Rows survive quoted newlines and Unicode line separators."""
+        lines = list(main.stream_csv_from_url(self.base_url + "/users.csv"))
+        # the quoted field spans two physical lines
+        self.assertEqual(len(lines), 6)
+
+        rows = [row[1:] for row in main.csv_row_generator(lines)]
+        self.assertEqual(rows, [
+            ("Ada Lovelace", "ada@example.com", "36"),
+            ("Line\nBreak", "break@example.com", "41"),
+            ("Nel\u0085son Mandela", "nelson@example.com", "95"),
+            ("Grace\x0bHopper", "grace@example.com", "85"),
+        ])
+
+    def test_gzip_transfer_encoding(self):
+        """A gzip Content-Encoding is undone before decoding."""
+        lines = main.stream_csv_from_url(self.base_url + "/users.csv.gz")
+        rows = list(main.csv_row_generator(lines))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][1], "Ada Lovelace")
+
+    def test_close_releases_response(self):
+        """The download is closed when the lines run out or are closed early."""
+        responses = []
+        real_get = main.requests.get
+
+        def get(*args, **kwargs):
+            responses.append(real_get(*args, **kwargs))
+            return responses[-1]
+
+        with patch.object(main.requests, "get", side_effect=get):
+            list(main.stream_csv_from_url(self.base_url + "/users.csv"))
+            lines = main.stream_csv_from_url(self.base_url + "/users.csv")
+            next(lines)
+            self.assertFalse(responses[1].raw.closed)
+            lines.close()
+
+        self.assertTrue(responses[0].raw.closed)
+        self.assertTrue(responses[1].raw.closed)
+
+if __name__ == "__main__":
+    unittest.main()
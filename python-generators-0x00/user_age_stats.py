@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+"""
+user_age_stats.py
+Show or rebuild the user_age_stats summary of user ages.
+
+    python user_age_stats.py rebuild   # create or repair the summary with one full scan
+    python user_age_stats.py           # print the average age and histogram
+
+Once the table exists, every seed insert path keeps it up to date in the
+same transaction as the rows it inserts, by counting the rows with an
+AgeStatsDelta.
+"""
+
+
+import argparse
+from decimal import ROUND_HALF_UP, Decimal
+
+# seed imports this module too, so its names are looked up at call time
+import seed
+
+
+AGE_STATS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS user_age_stats (
+        bucket INT PRIMARY KEY,
+        users BIGINT NOT NULL,
+        age_sum BIGINT NOT NULL
+    );
+    """
+
+# width of the user_age_stats histogram buckets, in years
+AGE_BUCKET_WIDTH = 10
+
+
+def create_age_stats_table(connection):
+    """Create the user_age_stats summary table (empty; see rebuild_age_stats)."""
+    cursor = connection.cursor()
+    cursor.execute(AGE_STATS_TABLE_DDL)
+    connection.commit()
+    cursor.close()
+
+
+def age_stats_enabled(connection):
+    """Return True if user_age_stats exists and must be kept up to date."""
+    cursor = connection.cursor(buffered=True)
+    try:
+        return seed.backend().table_exists(cursor, "user_age_stats")
+    finally:
+        cursor.close()
+
+
+class AgeStatsDelta:
+    """
+    Changes to user_age_stats collected while users are inserted.
+
+    apply() writes them with the inserting cursor, so the summary is
+    committed (or rolled back) in the same transaction as the rows.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, age, sign=1):
+        """Count one user of the given age; sign=-1 removes one."""
+        # ages are stored as whole numbers (DECIMAL(10, 0) on MySQL)
+        age = int(Decimal(str(age)).quantize(Decimal(1), ROUND_HALF_UP))
+        bucket = age // AGE_BUCKET_WIDTH * AGE_BUCKET_WIDTH
+        users, total = self.buckets.get(bucket, (0, 0))
+        self.buckets[bucket] = (users + sign, total + sign * age)
+
+    def count(self, rows, cursor=None, upsert=False):
+        """
+        Count user rows that are about to be written.
+
+        For an upsert, call before the rows are written: the ages stored
+        for the same emails are read with cursor and removed, as those
+        users are updated rather than added.
+        """
+        if upsert:
+            latest = {row[2]: row for row in rows}
+            rows = latest.values()
+            if latest:
+                placeholders = ", ".join(["%s"] * len(latest))
+                cursor.execute(
+                    f"SELECT age FROM user_data WHERE email IN ({placeholders})", list(latest)
+                )
+                for (age,) in cursor.fetchall():
+                    self.add(age, -1)
+        for row in rows:
+            self.add(row[3])
+
+    def track(self, rows):
+        """Pass rows through, counting each one."""
+        for row in rows:
+            self.add(row[3])
+            yield row
+
+    def apply(self, cursor):
+        """Write the collected changes and start over."""
+        changes = [
+            (bucket, users, total)
+            for bucket, (users, total) in sorted(self.buckets.items())
+            if users or total
+        ]
+        if changes:
+            cursor.executemany(seed.backend().age_stats_upsert_query, changes)
+        self.buckets.clear()
+
+
+def rebuild_age_stats(connection):
+    """
+    Recompute user_age_stats from a full scan of user_data.
+
+    Repairs the summary if it has drifted, and fills it when it is first
+    created. Run it while no imports are in progress.
+
+    Returns:
+        Number of users counted, or None on error
+    """
+    create_age_stats_table(connection)
+    ages = AgeStatsDelta()
+    read_cursor = connection.cursor()
+    write_cursor = connection.cursor()
+    try:
+        read_cursor.execute("SELECT age FROM user_data")
+        while True:
+            rows = read_cursor.fetchmany(seed.backend().fetch_size)
+            if not rows:
+                break
+            for (age,) in rows:
+                ages.add(age)
+        users = sum(count for count, _ in ages.buckets.values())
+
+        write_cursor.execute("DELETE FROM user_age_stats")
+        ages.apply(write_cursor)
+        connection.commit()
+        print(f"user_age_stats rebuilt from {users} users")
+        return users
+    except seed.Error as e:
+        print(f"Error rebuilding user_age_stats: {e}")
+        connection.rollback()
+        return None
+    finally:
+        read_cursor.close()
+        write_cursor.close()
+
+
+def average_age(connection=None):
+    """
+    Return the average user age from user_age_stats.
+
+    Sums one row per histogram bucket instead of scanning user_data, so
+    the cost does not grow with the number of users.
+
+    Args:
+        connection: Open connection to ALX_prodev (defaults to one
+            borrowed from the shared pool)
+
+    Returns:
+        The average age, or None if no users are counted
+    """
+    if connection is None:
+        with seed.get_pool().connection() as connection:
+            return average_age(connection)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT SUM(users), SUM(age_sum) FROM user_age_stats")
+        users, total = cursor.fetchone()
+    finally:
+        cursor.close()
+    return float(total) / float(users) if users else None
+
+
+def age_histogram(connection=None):
+    """
+    Return the user_age_stats histogram.
+
+    Returns:
+        Dictionary mapping each bucket's lowest age to its number of users
+    """
+    if connection is None:
+        with seed.get_pool().connection() as connection:
+            return age_histogram(connection)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT bucket, users FROM user_age_stats WHERE users > 0 ORDER BY bucket")
+        return {bucket: users for bucket, users in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show or rebuild user_age_stats.")
+    parser.add_argument("command", nargs="?", choices=("show", "rebuild"), default="show")
+    args = parser.parse_args(argv)
+
+    connection = seed.connect_to_prodev()
+    if connection is None:
+        return
+    try:
+        if args.command == "rebuild":
+            rebuild_age_stats(connection)
+        elif not age_stats_enabled(connection):
+            print("user_age_stats does not exist yet; run with 'rebuild' first")
+            return
+
+        average = average_age(connection)
+        if average is None:
+            print("No users counted")
+            return
+        print(f"Average age of users: {average:.2f}")
+        for bucket, users in age_histogram(connection).items():
+            print(f"  {bucket:>3}-{bucket + AGE_BUCKET_WIDTH - 1:<3} {users}")
+    except seed.Error as e:
+        print(f"Error reading user_age_stats: {e}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()